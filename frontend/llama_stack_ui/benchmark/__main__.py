@@ -0,0 +1,25 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import fire
+
+from llama_stack_ui.benchmark.evaluation import main as evaluate
+from llama_stack_ui.benchmark.ingestion import compare_main as compare, main as ingestion
+from llama_stack_ui.benchmark.load_test import main as load
+
+
+"""
+Benchmark entry point:
+
+    python -m llama_stack_ui.benchmark load --sessions=32 --turns=10
+    python -m llama_stack_ui.benchmark ingestion --output=ingestion.json
+    python -m llama_stack_ui.benchmark compare baseline.json ingestion.json
+    python -m llama_stack_ui.benchmark evaluate questions.csv --output=results.csv
+"""
+
+
+if __name__ == "__main__":
+    fire.Fire({"load": load, "ingestion": ingestion, "compare": compare, "evaluate": evaluate})
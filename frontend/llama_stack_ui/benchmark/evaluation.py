@@ -0,0 +1,342 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from llama_stack_ui.benchmark.load_test import HeadlessPlaceholder, percentile
+from llama_stack_ui.distribution.ui.modules.api import LlamaStackApi, llama_stack_api
+from llama_stack_ui.distribution.ui.modules.context import context_window_for
+from llama_stack_ui.distribution.ui.modules.pipeline import TurnSettings, run_direct_turn
+from llama_stack_ui.distribution.ui.modules.streaming import StreamRenderer
+from llama_stack_ui.distribution.ui.modules.utils import process_dataset
+
+
+"""
+Offline batch evaluation of models and collections.
+
+A CSV or Excel file of questions (and optionally expected answers) is loaded
+with process_dataset, each question is answered through the same
+retrieve/pack/generate pipeline as the chat page's direct mode with bounded
+concurrency, and the answers are scored in batches with llama-stack scoring
+functions. The results file has one row per question with the answer, its
+scores and the turn's latency breakdown:
+
+    python -m llama_stack_ui.benchmark evaluate questions.csv --output=results.csv \\
+        --model=llama-3-2-3b --vector_db_ids=f5-docs --concurrency=8
+"""
+
+QUESTION_COLUMNS = ("input_query", "question", "query")
+EXPECTED_COLUMNS = ("expected_answer", "answer", "ground_truth")
+DEFAULT_SCORING_FUNCTIONS = ["basic::subset_of"]
+
+# Fields of the turn_latency debug event copied into each result row
+LATENCY_FIELDS = (
+    "retrieval_s",
+    "context_packing_s",
+    "time_to_first_token_s",
+    "generation_s",
+    "total_s",
+    "context_tokens",
+    "prompt_tokens",
+    "completion_tokens",
+    "tokens_per_s",
+)
+
+
+def _pick_column(df: pd.DataFrame, requested: Optional[str], candidates: tuple) -> Optional[str]:
+    if requested:
+        if requested not in df.columns:
+            raise ValueError(f"column '{requested}' not found; available: {', '.join(map(str, df.columns))}")
+        return requested
+    return next((column for column in candidates if column in df.columns), None)
+
+
+def load_questions(path: str, question_column: Optional[str] = None, expected_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load an evaluation dataset into a DataFrame with input_query and expected_answer columns.
+
+    Args:
+        path: CSV or Excel file
+        question_column: Column holding the questions (input_query, question or query by default)
+        expected_column: Column holding reference answers, if any
+
+    Returns:
+        pd.DataFrame: input_query, expected_answer (None when absent) and the original columns
+    """
+    with open(path, "rb") as f:
+        df = process_dataset(f)
+    # process_dataset reports problems as (message, None) or None
+    if isinstance(df, tuple):
+        raise ValueError(df[0])
+    if df is None:
+        raise ValueError(f"could not read {path}")
+    question_column = _pick_column(df, question_column, QUESTION_COLUMNS)
+    if question_column is None:
+        raise ValueError(f"no question column found; expected one of {', '.join(QUESTION_COLUMNS)}")
+    expected_column = _pick_column(df, expected_column, EXPECTED_COLUMNS)
+    df = df.dropna(subset=[question_column]).reset_index(drop=True)
+    df["input_query"] = df[question_column].astype(str)
+    df["expected_answer"] = df[expected_column].map(lambda value: None if pd.isna(value) else str(value)) if expected_column else None
+    return df
+
+
+def answer_questions(
+    api: LlamaStackApi,
+    client,
+    questions: List[str],
+    vector_db_ids: List[str],
+    settings: TurnSettings,
+    concurrency: int = 4,
+    on_result: Optional[Callable[[int, dict], None]] = None,
+) -> List[dict]:
+    """
+    Answer questions through the direct-mode pipeline, at most concurrency at a time.
+
+    Args:
+        on_result: Called with (index, row) as each answer completes
+
+    Returns:
+        List[dict]: One row per question, in question order, with the answer,
+        an error message if the turn failed, and the turn's latency fields
+    """
+    rows: List[Optional[dict]] = [None] * len(questions)
+
+    def answer(index: int) -> dict:
+        debug_events = []
+        row = {"generated_answer": None, "error": None, "served_from_cache": False}
+        try:
+            generation = run_direct_turn(
+                api, client, client, questions[index], vector_db_ids, settings,
+                StreamRenderer(HeadlessPlaceholder()), debug_events,
+            )
+            row["generated_answer"] = generation.response
+            row["served_from_cache"] = generation.served_from_cache
+            latency = debug_events[0]
+            row.update({name: latency.get(name) for name in LATENCY_FIELDS})
+            # Retrieval failures do not fail the turn; keep them visible
+            retrieval_errors = [event["content"] for event in debug_events if event.get("type") == "error"]
+            if retrieval_errors:
+                row["error"] = "; ".join(retrieval_errors)
+        except Exception as e:
+            row["error"] = str(e)
+        return row
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="evaluate") as executor:
+        futures = {executor.submit(answer, index): index for index in range(len(questions))}
+        for future in as_completed(futures):
+            index = futures[future]
+            rows[index] = future.result()
+            if on_result:
+                on_result(index, rows[index])
+    return rows
+
+
+def score_rows(
+    api: LlamaStackApi,
+    client,
+    rows: List[dict],
+    scoring_functions: List[str],
+    scoring_params: Optional[dict] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> Dict[int, dict]:
+    """
+    Score rows with the given scoring functions through LlamaStackApi.run_scoring_batch.
+
+    Args:
+        rows: Scoring input rows (input_query, generated_answer, expected_answer)
+        scoring_params: scoring function id -> params, None for the defaults
+        batch_size: Rows per scoring request (SCORING_BATCH_SIZE by default)
+        concurrency: Scoring requests in flight (SCORING_CONCURRENCY by default)
+
+    Returns:
+        Dict[int, dict]: Row index -> {"<function>": score, ...}, plus a
+        scoring_error entry for rows that could not be fully scored
+    """
+    scores = {}
+    for index, score_rows_by_function, error in api.run_scoring_batch(
+        rows, scoring_functions, scoring_params, client=client, batch_size=batch_size, concurrency=concurrency
+    ):
+        scores[index] = {function_id: score_row.get("score") for function_id, score_row in score_rows_by_function.items()}
+        if error:
+            scores[index]["scoring_error"] = error
+        if len(scores) % 50 == 0 or len(scores) == len(rows):
+            print(f"scored {len(scores)}/{len(rows)}")
+    return scores
+
+
+def write_results(df: pd.DataFrame, output: str):
+    """Write results as CSV, Excel, JSON or JSON lines, chosen by the file extension."""
+    ext = os.path.splitext(output)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        df.to_excel(output, index=False)
+    elif ext == ".json":
+        df.to_json(output, orient="records", indent=2)
+    elif ext == ".jsonl":
+        df.to_json(output, orient="records", lines=True)
+    else:
+        df.to_csv(output, index=False)
+
+
+def run_evaluation(
+    dataset: str,
+    output: Optional[str] = "evaluation-results.csv",
+    model: Optional[str] = None,
+    vector_db_ids: Optional[List[str]] = None,
+    base_url: Optional[str] = None,
+    concurrency: int = 4,
+    scoring_functions: Optional[List[str]] = None,
+    scoring_params: Optional[dict] = None,
+    batch_size: Optional[int] = None,
+    scoring_concurrency: Optional[int] = None,
+    question_column: Optional[str] = None,
+    expected_column: Optional[str] = None,
+    settings: Optional[TurnSettings] = None,
+    api: Optional[LlamaStackApi] = None,
+) -> dict:
+    """
+    Answer and score every question of dataset and write the results.
+
+    Args:
+        dataset: CSV or Excel file of questions
+        output: Results file (CSV, xlsx, json or jsonl); None to skip writing
+        model: Model identifier (first LLM of the server by default)
+        vector_db_ids: Collections to retrieve from (all of the server's by default, [] for none)
+        base_url: LlamaStack endpoint (LLAMA_STACK_ENDPOINT by default)
+        concurrency: Questions answered at the same time
+        scoring_functions: Scoring function ids; basic::subset_of when the
+            dataset has expected answers, no scoring otherwise
+        scoring_params: scoring function id -> params
+        batch_size: Rows per scoring request (SCORING_BATCH_SIZE by default)
+        scoring_concurrency: Scoring requests in flight (SCORING_CONCURRENCY by default)
+        settings: Sampling settings (greedy decoding by default)
+
+    Returns:
+        dict: Summary with row counts, latency percentiles and mean scores
+    """
+    api = api or llama_stack_api
+    client = api.create_client_with_url(base_url) if base_url else api.client
+    df = load_questions(dataset, question_column, expected_column)
+
+    models = [m for m in api.list_models(client) if m.api_model_type == "llm"]
+    model_obj = next((m for m in models if m.identifier == model), None if model else (models[0] if models else None))
+    if model_obj is None:
+        raise ValueError(f"model {model or '(any LLM)'} not available at {client.base_url}")
+    if vector_db_ids is None:
+        vector_db_ids = [vector_db.identifier for vector_db in api.list_vector_dbs(client)]
+    settings = settings or TurnSettings(model=model_obj.identifier, temperature=0.0)
+    settings.model = model_obj.identifier
+    settings.context_window = context_window_for(model_obj)
+
+    lock = threading.Lock()
+    done = [0]
+
+    def report_progress(index: int, row: dict):
+        with lock:
+            done[0] += 1
+            if done[0] % 10 == 0 or done[0] == len(df):
+                print(f"answered {done[0]}/{len(df)}")
+
+    started = time.perf_counter()
+    rows = answer_questions(
+        api, client, df["input_query"].tolist(), vector_db_ids, settings, concurrency, on_result=report_progress
+    )
+    answer_seconds = time.perf_counter() - started
+    results = pd.concat([df, pd.DataFrame(rows)], axis=1)
+
+    has_expected = results["expected_answer"].notna().any()
+    scoring_functions = scoring_functions if scoring_functions is not None else (DEFAULT_SCORING_FUNCTIONS if has_expected else [])
+    scoring_seconds = 0.0
+    if scoring_functions:
+        # Only answered questions are scored
+        scorable = [index for index, row in enumerate(rows) if row["generated_answer"] is not None]
+        scoring_input = [
+            {
+                "input_query": results.at[index, "input_query"],
+                "generated_answer": rows[index]["generated_answer"],
+                "expected_answer": results.at[index, "expected_answer"] or "",
+            }
+            for index in scorable
+        ]
+        scoring_started = time.perf_counter()
+        scores = score_rows(
+            api, client, scoring_input, scoring_functions, scoring_params, batch_size, scoring_concurrency
+        )
+        scoring_seconds = time.perf_counter() - scoring_started
+        score_frame = pd.DataFrame([scores.get(position, {}) for position in range(len(scorable))], index=scorable)
+        results = results.join(score_frame.add_prefix("score:"))
+
+    if output:
+        write_results(results, output)
+
+    totals = [row["total_s"] for row in rows if row.get("total_s") is not None]
+    ttfts = [row["time_to_first_token_s"] for row in rows if row.get("time_to_first_token_s") is not None]
+    score_columns = [column for column in results.columns if str(column).startswith("score:") and column != "score:scoring_error"]
+    return {
+        "rows": len(results),
+        "failed": int(sum(1 for row in rows if row["generated_answer"] is None)),
+        "model": settings.model,
+        "vector_db_ids": vector_db_ids,
+        "answer_seconds": round(answer_seconds, 2),
+        "scoring_seconds": round(scoring_seconds, 2),
+        "turn_p50_s": percentile(totals, 50),
+        "turn_p95_s": percentile(totals, 95),
+        "ttft_p50_s": percentile(ttfts, 50),
+        "ttft_p95_s": percentile(ttfts, 95),
+        "mean_scores": {
+            column[len("score:"):]: round(float(pd.to_numeric(results[column], errors="coerce").mean()), 4)
+            for column in score_columns
+        },
+        "output": output,
+    }
+
+
+def main(
+    dataset: str,
+    output: str = "evaluation-results.csv",
+    model: Optional[str] = None,
+    vector_db_ids: Optional[List[str]] = None,
+    base_url: Optional[str] = None,
+    concurrency: int = 4,
+    scoring_functions: Optional[List[str]] = None,
+    batch_size: Optional[int] = None,
+    scoring_concurrency: Optional[int] = None,
+    question_column: Optional[str] = None,
+    expected_column: Optional[str] = None,
+    temperature: float = 0.0,
+    max_tokens: int = 512,
+    system_prompt: Optional[str] = None,
+):
+    """Run a batch evaluation (see run_evaluation) and print its summary as JSON."""
+    settings = TurnSettings(model=model or "", temperature=temperature, max_tokens=max_tokens)
+    if system_prompt:
+        settings.system_prompt = system_prompt
+    if isinstance(vector_db_ids, str):
+        vector_db_ids = [vector_db_id for vector_db_id in vector_db_ids.split(",") if vector_db_id]
+    if isinstance(scoring_functions, str):
+        scoring_functions = [function_id for function_id in scoring_functions.split(",") if function_id]
+    summary = run_evaluation(
+        dataset,
+        output=output,
+        model=model,
+        vector_db_ids=vector_db_ids,
+        base_url=base_url,
+        concurrency=concurrency,
+        scoring_functions=scoring_functions,
+        batch_size=batch_size,
+        scoring_concurrency=scoring_concurrency,
+        question_column=question_column,
+        expected_column=expected_column,
+        settings=settings,
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,390 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+"""
+Local stand-in for a LlamaStack server, for load tests of the UI.
+
+Serves the routes the chat pipeline and the vector DB page use, with
+configurable latency: model and vector DB listings, rag_tool.query,
+rag_tool.insert, Files API uploads and deletes, scoring.score and streaming
+or non-streaming chat_completion. No model is involved; answers are filler
+tokens emitted at a fixed rate. Uploaded files are read and discarded; only
+their size is kept, for rag_tool.insert documents that reference them.
+"""
+
+
+@dataclass
+class FakeLlamaStackConfig:
+    models: List[str] = field(default_factory=lambda: ["fake-llm"])
+    vector_dbs: List[str] = field(default_factory=lambda: ["fake-docs"])
+    context_window: int = 8192
+    # Seconds per rag_tool.query / rag_tool.insert call
+    rag_latency: float = 0.05
+    insert_latency: float = 0.02
+    # Seconds per Files API upload
+    file_latency: float = 0.01
+    # Seconds per scoring.score call, plus per scored row
+    scoring_latency: float = 0.05
+    scoring_row_latency: float = 0.005
+    # Seconds before the first streamed token, then tokens per second
+    first_token_latency: float = 0.2
+    tokens_per_second: float = 50.0
+    # Answer length in tokens (capped by the request's max_tokens)
+    response_tokens: int = 128
+    chunks_per_query: int = 5
+    chunk_words: int = 200
+    # Relative random variation applied to every latency
+    jitter: float = 0.1
+    # Called with (vector_db_id, chunks) for every insert, each chunk shaped
+    # like the document column of llama-stack's vector tables
+    on_insert: Optional[Callable[[str, List[dict]], None]] = None
+
+
+# File id in the content URL of a document uploaded through the Files API
+_FILE_URI = re.compile(r"/files/([^/]+)/content")
+
+
+def _chunks_from_documents(body: dict, file_sizes: Dict[str, int]) -> List[dict]:
+    """Split rag_tool.insert documents into placeholder chunks of roughly chunk_size_in_tokens."""
+    chunk_chars = int(body.get("chunk_size_in_tokens") or 512) * 4
+    chunks = []
+    for document in body.get("documents") or []:
+        content = document.get("content")
+        if isinstance(content, dict):
+            match = _FILE_URI.search(str(content.get("uri") or ""))
+            size = file_sizes.get(match.group(1), 0) if match else 0
+        elif isinstance(content, str) and content.startswith("data:"):
+            # Decoded size of the base64 payload
+            size = (len(content) - content.find(",") - 1) * 3 // 4
+        else:
+            size = len(content) if isinstance(content, str) else 0
+        document_id = document.get("document_id")
+        metadata = {**(document.get("metadata") or {}), "document_id": document_id}
+        for index in range(max(1, -(-size // chunk_chars))):
+            chunks.append({
+                "content": f"{document_id} chunk {index}",
+                "metadata": metadata,
+                "chunk_metadata": {
+                    "chunk_id": f"{document_id}:{index}",
+                    "document_id": document_id,
+                    "source": metadata.get("source"),
+                },
+            })
+    return chunks
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _sleep(self, seconds: float):
+        if seconds > 0:
+            jitter = self.server.config.jitter
+            time.sleep(max(0.0, seconds * (1 + random.uniform(-jitter, jitter))))
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self):
+        config = self.server.config
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/v1/models":
+            self._send_json({"data": [
+                {
+                    "identifier": model,
+                    "provider_resource_id": model,
+                    "provider_id": "fake",
+                    "type": "model",
+                    "model_type": "llm",
+                    "metadata": {"context_length": config.context_window},
+                }
+                for model in config.models
+            ]})
+        elif path == "/v1/vector-dbs":
+            self._send_json({"data": [
+                {
+                    "identifier": vector_db,
+                    "provider_resource_id": vector_db,
+                    "provider_id": "fake",
+                    "type": "vector_db",
+                    "embedding_model": "fake-embedding",
+                    "embedding_dimension": 384,
+                }
+                for vector_db in config.vector_dbs
+            ]})
+        elif path in ("/v1/toolgroups", "/v1/tools", "/v1/providers"):
+            self._send_json({"data": []})
+        elif path == "/v1/health":
+            self._send_json({"status": "OK"})
+        else:
+            self._send_json({"detail": f"unknown route {path}"}, status=404)
+
+    def _iter_body(self, block_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Request body in blocks, plain or with chunked transfer encoding."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return
+                remaining = size
+                while remaining:
+                    block = self.rfile.read(min(block_size, remaining))
+                    remaining -= len(block)
+                    yield block
+                self.rfile.readline()
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining > 0:
+            block = self.rfile.read(min(block_size, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        self.server.count(path)
+        if path == "/v1/openai/v1/files":
+            self._create_file()
+            return
+        body = self._read_json()
+        if path == "/v1/tool-runtime/rag-tool/query":
+            self._rag_query(body)
+        elif path == "/v1/tool-runtime/rag-tool/insert":
+            self._sleep(self.server.config.insert_latency * max(1, len(body.get("documents") or [])))
+            self._store_chunks(body.get("vector_db_id"), _chunks_from_documents(body, self.server.file_sizes()))
+            self._send_json(None)
+        elif path == "/v1/vector-io/insert":
+            self._sleep(self.server.config.insert_latency)
+            self._store_chunks(body.get("vector_db_id"), body.get("chunks") or [])
+            self._send_json(None)
+        elif path == "/v1/inference/chat-completion":
+            self._chat_completion(body)
+        elif path == "/v1/scoring/score":
+            self._score(body)
+        else:
+            self._send_json({"detail": f"unknown route {path}"}, status=404)
+
+    def do_DELETE(self):
+        path = self.path.split("?")[0].rstrip("/")
+        self.server.count("DELETE /v1/openai/v1/files" if path.startswith("/v1/openai/v1/files/") else path)
+        match = re.fullmatch(r"/v1/openai/v1/files/([^/]+)", path)
+        if match and self.server.delete_file(match.group(1)):
+            self._send_json({"id": match.group(1), "deleted": True, "object": "file"})
+        else:
+            self._send_json({"detail": f"unknown route {path}"}, status=404)
+
+    def _create_file(self):
+        # Multipart upload: count the bytes and keep the filename, not the content
+        size, head = 0, b""
+        for block in self._iter_body():
+            if len(head) < 4096:
+                head += block[:4096]
+            size += len(block)
+        match = re.search(rb'filename="([^"]*)"', head)
+        filename = match.group(1).decode("utf-8", "replace") if match else "upload"
+        self._sleep(self.server.config.file_latency)
+        file_id = f"file-{uuid.uuid4().hex}"
+        # The multipart framing is counted too; close enough for placeholder chunks
+        self.server.add_file(file_id, size)
+        now = int(time.time())
+        self._send_json({
+            "id": file_id,
+            "bytes": size,
+            "created_at": now,
+            "expires_at": now + 3600,
+            "filename": filename,
+            "object": "file",
+            "purpose": "assistants",
+        })
+
+    def _store_chunks(self, vector_db_id: str, chunks: List[dict]):
+        if self.server.config.on_insert is not None and chunks:
+            self.server.config.on_insert(vector_db_id, chunks)
+
+    def _rag_query(self, body: dict):
+        config = self.server.config
+        self._sleep(config.rag_latency)
+        vector_db_ids = body.get("vector_db_ids") or config.vector_dbs
+        query = str(body.get("content") or "")
+        chunks, document_ids, scores = [], [], []
+        for i in range(config.chunks_per_query):
+            vector_db_id = vector_db_ids[i % len(vector_db_ids)]
+            words = " ".join(f"{vector_db_id}-w{(i * config.chunk_words + j) % 997}" for j in range(config.chunk_words))
+            chunks.append(f"Passage {i} about {query[:40]}: {words}")
+            document_ids.append(f"{vector_db_id}-doc-{i}.txt")
+            scores.append(round(1.0 - i * 0.05, 3))
+        content = [{"type": "text", "text": "knowledge_search tool found {} chunks:\nBEGIN of knowledge_search tool results.\n".format(len(chunks))}]
+        content += [
+            {"type": "text", "text": f"Result {i + 1}\nContent: {chunk}\nMetadata: {{'document_id': '{document_ids[i]}'}}\n"}
+            for i, chunk in enumerate(chunks)
+        ]
+        content.append({"type": "text", "text": "END of knowledge_search tool results.\n"})
+        self._send_json({
+            "content": content,
+            "metadata": {"document_ids": document_ids, "chunks": chunks, "scores": scores},
+        })
+
+    def _score(self, body: dict):
+        # Every scoring function checks whether the expected answer appears in the generated one
+        config = self.server.config
+        rows = body.get("input_rows") or []
+        self._sleep(config.scoring_latency + config.scoring_row_latency * len(rows))
+        score_rows = [
+            {"score": 1.0 if str(row.get("expected_answer", "")).lower() in str(row.get("generated_answer", "")).lower() else 0.0}
+            for row in rows
+        ]
+        accuracy = sum(row["score"] for row in score_rows) / len(score_rows) if score_rows else 0.0
+        self._send_json({"results": {
+            function_id: {"score_rows": score_rows, "aggregated_results": {"accuracy": {"accuracy": accuracy}}}
+            for function_id in body.get("scoring_functions") or {}
+        }})
+
+    def _chat_completion(self, body: dict):
+        config = self.server.config
+        max_tokens = int((body.get("sampling_params") or {}).get("max_tokens") or config.response_tokens)
+        tokens = min(config.response_tokens, max_tokens)
+        prompt_tokens = len(json.dumps(body.get("messages") or [])) // 4
+        self._sleep(config.first_token_latency)
+        if not body.get("stream"):
+            self._sleep(tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0)
+            self._send_json({
+                "completion_message": {
+                    "role": "assistant",
+                    "content": " ".join(f"token{i}" for i in range(tokens)),
+                    "stop_reason": "end_of_turn",
+                    "tool_calls": [],
+                },
+                "metrics": [
+                    {"metric": "prompt_tokens", "value": prompt_tokens},
+                    {"metric": "completion_tokens", "value": tokens},
+                ],
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send_event(event: dict, metrics=None):
+            payload = {"event": event}
+            if metrics:
+                payload["metrics"] = metrics
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send_event({"event_type": "start", "delta": {"type": "text", "text": ""}})
+        interval = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        for i in range(tokens):
+            send_event({"event_type": "progress", "delta": {"type": "text", "text": f"token{i} "}})
+            self._sleep(interval)
+        send_event(
+            {"event_type": "complete", "delta": {"type": "text", "text": ""}, "stop_reason": "end_of_turn"},
+            metrics=[
+                {"metric": "prompt_tokens", "value": prompt_tokens},
+                {"metric": "completion_tokens", "value": tokens},
+                {"metric": "total_tokens", "value": prompt_tokens + tokens},
+            ],
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, config: FakeLlamaStackConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self._lock = threading.Lock()
+        self.requests = {}
+        # file id -> size of files uploaded through the Files API
+        self._files: Dict[str, int] = {}
+
+    def count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def add_file(self, file_id: str, size: int):
+        with self._lock:
+            self._files[file_id] = size
+
+    def delete_file(self, file_id: str) -> bool:
+        with self._lock:
+            return self._files.pop(file_id, None) is not None
+
+    def file_sizes(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._files)
+
+
+class FakeLlamaStack:
+    """
+    Fake LlamaStack server running on a background thread.
+
+    Usage:
+        with FakeLlamaStack(FakeLlamaStackConfig(tokens_per_second=30)) as server:
+            client = LlamaStackClient(base_url=server.url)
+    """
+
+    def __init__(self, config: FakeLlamaStackConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeLlamaStackConfig()
+        self._server = _Server((host, port), self.config)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def request_counts(self) -> dict:
+        """POST and DELETE requests served, per route"""
+        with self._server._lock:
+            return dict(self._server.requests)
+
+    def start(self) -> "FakeLlamaStack":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llamastack", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLlamaStack":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
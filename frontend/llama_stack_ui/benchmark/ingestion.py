@@ -0,0 +1,585 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from llama_stack_client import LlamaStackClient
+
+from llama_stack_ui.benchmark.fake_llamastack import FakeLlamaStack, FakeLlamaStackConfig
+from llama_stack_ui.distribution.ui.modules.ingestion import (
+    ChunkingSettings,
+    ingest_documents,
+    max_rss_bytes,
+    plan_collection_uploads,
+    plan_uploads,
+    store_planned_uploads,
+)
+from llama_stack_ui.distribution.ui.modules.pgvector import PgVectorStore, table_name
+from llama_stack_ui.distribution.ui.modules.utils import data_url_from_file, file_content_hash
+
+
+"""
+Ingestion and document catalog benchmarks.
+
+Synthetic corpora (many small txt files, a few large PDFs) go through the
+same upload path as the vector DB page - planning against the catalog,
+batched ingestion, pruning of replaced versions, catalog refresh - against a
+FakeLlamaStack whose inserts are written as chunk rows into a local
+Postgres+pgvector, so the catalog queries see realistic tables. Catalog
+listing and deletion latency are measured on seeded collections of growing
+size. Postgres is taken from the PGVECTOR_* environment variables; when it is
+unreachable the catalog parts are skipped and only ingestion is measured.
+
+Results are written as JSON; compare() flags regressions between two runs:
+
+    python -m llama_stack_ui.benchmark ingestion --output=baseline.json
+    python -m llama_stack_ui.benchmark ingestion --output=current.json
+    python -m llama_stack_ui.benchmark compare baseline.json current.json
+"""
+
+BENCH_PREFIX = "bench-"
+
+EMBEDDING_DIMENSION = 384
+
+WORDS = (
+    "api gateway policy firewall request response header token rate limit bot defense "
+    "origin pool load balancer certificate tenant namespace route service endpoint "
+    "discovery schema validation signature attack mitigation latency throughput cache"
+).split()
+
+
+class SyntheticUpload(io.BytesIO):
+    """In-memory file with the attributes of a Streamlit UploadedFile."""
+
+    def __init__(self, name: str, data: bytes, mime_type: str):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.type = mime_type
+        self.file_id = f"{BENCH_PREFIX}{name}"
+
+
+def _text(rng: random.Random, size: int, tag: str) -> str:
+    """About size characters of filler prose, unique per tag."""
+    words, length = [tag], len(tag)
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_bytes(pages: List[str], line_chars: int = 90, lines_per_page: int = 60) -> bytes:
+    """
+    Minimal uncompressed PDF with one text page per entry of pages.
+
+    Written by hand so the benchmark needs no PDF library; pypdf can extract
+    the text again for client-side chunking.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for text in pages:
+        lines = [text[i:i + line_chars] for i in range(0, len(text), line_chars)][:lines_per_page]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>"
+        )
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def generate_corpus(
+    small_files: int = 200,
+    small_file_kb: int = 4,
+    large_files: int = 3,
+    large_file_mb: float = 5.0,
+    seed: int = 0,
+) -> List[SyntheticUpload]:
+    """
+    Deterministic synthetic upload set: many small txt files and a few large PDFs.
+
+    Every file has distinct content, so none is skipped as a duplicate.
+    """
+    rng = random.Random(seed)
+    corpus = [
+        SyntheticUpload(
+            f"{BENCH_PREFIX}note-{i:05d}.txt",
+            _text(rng, small_file_kb * 1024, f"note-{i}").encode("utf-8"),
+            "text/plain",
+        )
+        for i in range(small_files)
+    ]
+    page_chars = 5000
+    for i in range(large_files):
+        pages = [_text(rng, page_chars, f"report-{i}-page-{page}") for page in range(int(large_file_mb * 2**20 / page_chars) or 1)]
+        corpus.append(SyntheticUpload(f"{BENCH_PREFIX}report-{i:02d}.pdf", pdf_bytes(pages), "application/pdf"))
+    return corpus
+
+
+def _corpus_groups(corpus: List[SyntheticUpload]) -> Dict[str, List[SyntheticUpload]]:
+    groups = {}
+    for uploaded_file in corpus:
+        groups.setdefault(os.path.splitext(uploaded_file.name)[1].lstrip(".") or "other", []).append(uploaded_file)
+    return groups
+
+
+def bench_data_url(corpus: List[SyntheticUpload], repeat: int = 3) -> Dict[str, dict]:
+    """
+    Throughput and peak allocation of data_url_from_file, per file type.
+
+    Peak memory is traced with tracemalloc for the largest file of each type,
+    so it reflects this function alone rather than the process high-water mark.
+    """
+    results = {}
+    for kind, files in _corpus_groups(corpus).items():
+        total_bytes = sum(uploaded_file.size for uploaded_file in files)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for uploaded_file in files:
+                data_url_from_file(uploaded_file)
+            timings.append(time.perf_counter() - started)
+        largest = max(files, key=lambda uploaded_file: uploaded_file.size)
+        tracemalloc.start()
+        data_url_from_file(largest)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        seconds = statistics.median(timings)
+        results[kind] = {
+            "files": len(files),
+            "bytes": total_bytes,
+            "seconds": round(seconds, 4),
+            "files_per_second": round(len(files) / seconds, 1) if seconds else None,
+            "mb_per_second": round(total_bytes / 2**20 / seconds, 1) if seconds else None,
+            "largest_file_bytes": largest.size,
+            "peak_traced_bytes": peak,
+        }
+    return results
+
+
+def _prepare_chunk_table(store: PgVectorStore, vector_db_id: str, dimension: int = EMBEDDING_DIMENSION):
+    """(Re)create the chunk table of vector_db_id the way llama-stack's pgvector provider does, and forget its catalog."""
+    table = table_name(vector_db_id)
+
+    async def prepare(conn):
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        await conn.execute(f"DROP TABLE IF EXISTS {table}")
+        await conn.execute(f"CREATE TABLE {table} (id TEXT PRIMARY KEY, document JSONB, embedding vector({dimension}))")
+
+    store.run(prepare)
+    store.forget_catalog(vector_db_id)
+
+
+def _drop_collection(store: PgVectorStore, vector_db_id: str):
+    async def drop(conn):
+        await conn.execute(f"DROP TABLE IF EXISTS {table_name(vector_db_id)}")
+
+    store.run(drop)
+    store.forget_catalog(vector_db_id)
+
+
+def chunk_writer(store: PgVectorStore, dimension: int = EMBEDDING_DIMENSION):
+    """FakeLlamaStackConfig.on_insert hook storing inserted chunks as rows of the chunk table."""
+
+    def write(vector_db_id: str, chunks: List[dict]):
+        rows = []
+        for index, chunk in enumerate(chunks):
+            chunk_id = (chunk.get("chunk_metadata") or {}).get("chunk_id") or f"{time.time_ns()}-{index}"
+            rows.append((chunk_id, json.dumps(chunk), "[" + ",".join(["0.1"] * dimension) + "]"))
+
+        async def insert(conn):
+            await conn.executemany(
+                f"""
+                INSERT INTO {table_name(vector_db_id)} (id, document, embedding) VALUES ($1, $2::jsonb, $3::vector)
+                ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document
+                """,
+                rows,
+            )
+
+        store.run(insert, timeout=store.command_timeout * 10)
+
+    return write
+
+
+def bench_upload(
+    corpus: List[SyntheticUpload],
+    store: Optional[PgVectorStore] = None,
+    chunking: Optional[ChunkingSettings] = None,
+    fake_config: Optional[FakeLlamaStackConfig] = None,
+    mode: str = "inline",
+) -> dict:
+    """
+    Upload corpus into a fresh collection through the vector DB page's upload path.
+
+    With a store, the fake llama-stack writes chunk rows into Postgres and the
+    upload is planned against, and finalized in, the document catalog; without
+    one only the ingestion itself is measured. mode is the upload mode,
+    "inline" (data URLs) or "files" (Files API).
+    """
+    vector_db_id = f"{BENCH_PREFIX}upload"
+    fake_config = replace(fake_config or FakeLlamaStackConfig(), vector_dbs=[vector_db_id], jitter=0.0)
+    if store is not None:
+        _prepare_chunk_table(store, vector_db_id)
+        fake_config.on_insert = chunk_writer(store)
+
+    content_hashes = {uploaded_file.name: file_content_hash(uploaded_file) for uploaded_file in corpus}
+    total_bytes = sum(uploaded_file.size for uploaded_file in corpus)
+    rss_before = max_rss_bytes()
+    with FakeLlamaStack(fake_config) as server:
+        client = LlamaStackClient(base_url=server.url)
+        started = time.perf_counter()
+        if store is not None:
+            plan = plan_collection_uploads(store, vector_db_id, corpus, content_hashes)
+            plan_seconds = time.perf_counter() - started
+            stats = store_planned_uploads(client, store, vector_db_id, plan, content_hashes, chunking=chunking, mode=mode)
+        else:
+            plan = plan_uploads(corpus, content_hashes, [])
+            plan_seconds = time.perf_counter() - started
+            stats = ingest_documents(
+                client, vector_db_id, plan.to_ingest, chunking=chunking, mode=mode, content_hashes=content_hashes
+            )
+        elapsed = time.perf_counter() - started
+        requests = server.request_counts()
+        client.close()
+
+    result = {
+        "documents": stats.documents,
+        "failed": stats.failed,
+        "bytes": total_bytes,
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(stats.documents / elapsed, 2) if elapsed else None,
+        "mb_per_second": round(stats.bytes_read / 2**20 / elapsed, 2) if elapsed else None,
+        "plan_seconds": round(plan_seconds, 4),
+        "ingest_seconds": round(stats.elapsed_seconds, 3),
+        # Pruning replaced versions and refreshing the catalog after ingestion
+        "catalog_update_seconds": round(elapsed - plan_seconds - stats.elapsed_seconds, 4) if store is not None else None,
+        "batches": stats.batches,
+        "retries": stats.retries,
+        "peak_payload_bytes": stats.peak_payload_bytes,
+        "rss_peak_growth_bytes": stats.rss_peak_growth_bytes,
+        "rss_peak_bytes": max(rss_before, max_rss_bytes()),
+        "stage_seconds": {stage: round(seconds, 3) for stage, seconds in stats.stage_seconds.items()},
+        "requests": requests,
+        "errors": dict(list(stats.errors.items())[:20]),
+    }
+    if store is not None:
+        result["chunks_stored"] = store.run(_count_rows(vector_db_id))
+        _drop_collection(store, vector_db_id)
+    return result
+
+
+def _count_rows(vector_db_id: str):
+    async def count(conn):
+        return await conn.fetchval(f"SELECT count(*) FROM {table_name(vector_db_id)}")
+
+    return count
+
+
+def _seed_collection(store: PgVectorStore, vector_db_id: str, documents: int, chunks_per_document: int, dimension: int):
+    """Fill a fresh chunk table with documents x chunks_per_document rows, generated inside Postgres."""
+    _prepare_chunk_table(store, vector_db_id, dimension)
+
+    async def seed(conn):
+        await conn.execute(
+            f"""
+            INSERT INTO {table_name(vector_db_id)} (id, document, embedding)
+            SELECT doc.name || ':' || c,
+                   jsonb_build_object(
+                       'content', 'chunk ' || c || ' of ' || doc.name,
+                       'metadata', jsonb_build_object('document_id', doc.name, 'source', doc.name, 'content_hash', md5(doc.name)),
+                       'chunk_metadata', jsonb_build_object('chunk_id', doc.name || ':' || c, 'source', doc.name)
+                   ),
+                   array_fill(0.1::real, ARRAY[$3::int])::vector
+            FROM (SELECT '{BENCH_PREFIX}doc-' || lpad(d::text, 7, '0') || '.txt' AS name FROM generate_series(1, $1) d) doc,
+                 generate_series(1, $2) c
+            """,
+            documents,
+            chunks_per_document,
+            dimension,
+        )
+        await conn.execute(f"ANALYZE {table_name(vector_db_id)}")
+
+    store.run(seed, timeout=max(store.command_timeout, documents / 100))
+
+
+def _timed(fn, repeat: int) -> float:
+    """Median seconds of repeat calls to fn."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings), 5)
+
+
+def bench_catalog(
+    store: PgVectorStore,
+    sizes: Sequence[int] = (100, 1000, 10000),
+    chunks_per_document: int = 4,
+    page_size: int = 50,
+    delete_batch: int = 10,
+    repeat: int = 5,
+    dimension: int = EMBEDDING_DIMENSION,
+) -> List[dict]:
+    """
+    Catalog build, listing, lookup and deletion latency for collections of each size.
+
+    Each collection is seeded directly in Postgres, measured and dropped again.
+    """
+    results = []
+    for size in sizes:
+        vector_db_id = f"{BENCH_PREFIX}catalog-{size}"
+        seed_started = time.perf_counter()
+        _seed_collection(store, vector_db_id, size, chunks_per_document, dimension)
+        seed_seconds = time.perf_counter() - seed_started
+        names = [f"{BENCH_PREFIX}doc-{d:07d}.txt" for d in range(1, size + 1)]
+        try:
+            started = time.perf_counter()
+            store.ensure_catalog(vector_db_id, rebuild=True)
+            build_seconds = time.perf_counter() - started
+            middle = names[len(names) // 2]
+            lookup = names[-page_size:]
+            results.append({
+                "size": size,
+                "chunks": size * chunks_per_document,
+                "seed_seconds": round(seed_seconds, 3),
+                "catalog_build_seconds": round(build_seconds, 4),
+                "list_all_seconds": _timed(lambda: store.list_documents(vector_db_id), repeat),
+                "first_page_seconds": _timed(lambda: store.list_documents_page(vector_db_id, limit=page_size), repeat),
+                "deep_page_seconds": _timed(lambda: store.list_documents_page(vector_db_id, after=middle, limit=page_size), repeat),
+                "search_seconds": _timed(lambda: store.list_documents_page(vector_db_id, limit=page_size, search="00042"), repeat),
+                "find_documents_seconds": _timed(lambda: store.find_documents(vector_db_id, lookup, []), repeat),
+                "refresh_documents_seconds": _timed(lambda: store.refresh_documents(vector_db_id, lookup), repeat),
+                "delete_documents_seconds": _timed_delete(store, vector_db_id, names, delete_batch, repeat),
+            })
+        finally:
+            _drop_collection(store, vector_db_id)
+    return results
+
+
+def _timed_delete(store: PgVectorStore, vector_db_id: str, names: List[str], batch: int, repeat: int) -> Optional[float]:
+    """Median seconds to delete batch documents, using distinct documents each round."""
+    timings = []
+    for round_index in range(min(repeat, len(names) // max(1, batch))):
+        sources = names[round_index * batch:(round_index + 1) * batch]
+        started = time.perf_counter()
+        store.delete_documents(vector_db_id, sources)
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings), 5) if timings else None
+
+
+def _postgres_error(store: PgVectorStore) -> Optional[str]:
+    """None if the store's Postgres answers, else the connection error."""
+    async def ping(conn):
+        return await conn.fetchval("SELECT 1")
+
+    try:
+        store.run(ping, timeout=10)
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pgvector_host": os.environ.get("PGVECTOR_HOST", "pgvector"),
+        "settings": {
+            key: os.environ[key]
+            for key in ("RAG_UPLOAD_MODE", "RAG_INLINE_MAX_BYTES", "INGEST_BATCH_SIZE", "INGEST_WORKERS", "CLIENT_CHUNKING", "CHUNK_SIZE_IN_TOKENS")
+            if key in os.environ
+        },
+    }
+
+
+def run_suite(
+    output: Optional[str] = "ingestion-benchmark.json",
+    small_files: int = 200,
+    small_file_kb: int = 4,
+    large_files: int = 3,
+    large_file_mb: float = 5.0,
+    catalog_sizes: Sequence[int] = (100, 1000, 10000),
+    client_side_chunking: bool = False,
+    insert_latency: float = 0.02,
+    use_postgres: bool = True,
+    upload_modes: Sequence[str] = ("files", "inline"),
+) -> dict:
+    """
+    Run the ingestion benchmarks and write the results as JSON.
+
+    Args:
+        output: JSON file to write (None to only return the results)
+        small_files: Number of small txt files in the corpus
+        small_file_kb: Size of each small file
+        large_files: Number of large PDFs in the corpus
+        large_file_mb: Size of each PDF
+        catalog_sizes: Documents per collection for the catalog benchmark
+        client_side_chunking: Chunk in the UI pod and insert through vector_io
+        insert_latency: Seconds the fake llama-stack spends per inserted document
+        use_postgres: Use the PGVECTOR_* Postgres for the catalog paths
+        upload_modes: Upload modes to measure ("inline", "files"), as a list or comma-separated
+
+    Returns:
+        dict: The results, as written to output
+    """
+    if isinstance(upload_modes, str):
+        upload_modes = [mode for mode in upload_modes.split(",") if mode]
+    corpus = generate_corpus(small_files, small_file_kb, large_files, large_file_mb)
+    store, postgres_error = None, "disabled"
+    if use_postgres:
+        store = PgVectorStore.from_env()
+        postgres_error = _postgres_error(store)
+        if postgres_error:
+            store.close()
+            store = None
+    chunking = ChunkingSettings(client_side=client_side_chunking)
+    fake_config = FakeLlamaStackConfig(insert_latency=insert_latency)
+    groups = _corpus_groups(corpus)
+    results = {"environment": _environment(), "corpus": {
+        kind: {"files": len(files), "bytes": sum(uploaded_file.size for uploaded_file in files)}
+        for kind, files in groups.items()
+    }}
+    try:
+        # Uploads first, in ascending memory use (files mode holds no encoded
+        # copy): the RSS high-water mark only ever grows
+        results["upload"] = {
+            mode: {
+                kind: bench_upload(files, store, chunking=chunking, fake_config=fake_config, mode=mode)
+                for kind, files in groups.items()
+            }
+            for mode in upload_modes
+        }
+        results["data_url"] = bench_data_url(corpus)
+        if store is not None:
+            results["catalog"] = bench_catalog(store, catalog_sizes)
+        else:
+            results["catalog"] = {"skipped": postgres_error}
+    finally:
+        if store is not None:
+            store.close()
+
+    if output:
+        with open(output, "w") as out:
+            json.dump(results, out, indent=2)
+    return results
+
+
+# Metric name suffixes and whether larger values are better
+_METRIC_DIRECTIONS = (("_per_second", True), ("_seconds", False), ("_bytes", False))
+
+
+def _flatten(results, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a results document; catalog entries are keyed by collection size."""
+    flat = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            if key in ("environment", "requests", "errors"):
+                continue
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(results, list):
+        for entry in results:
+            if isinstance(entry, dict) and "size" in entry:
+                flat.update(_flatten(entry, f"{prefix}{entry['size']}."))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix.rstrip(".")] = float(results)
+    return flat
+
+
+def compare(baseline: str, current: str, tolerance: float = 0.1) -> List[str]:
+    """
+    Compare two result files and list metrics that got worse by more than tolerance.
+
+    Throughput metrics (*_per_second) regress when they drop, latency and
+    memory metrics (*_seconds, *_bytes) when they grow.
+
+    Returns:
+        List[str]: One line per regression, empty when there is none
+    """
+    with open(baseline) as f:
+        before = _flatten(json.load(f))
+    with open(current) as f:
+        after = _flatten(json.load(f))
+    regressions = []
+    for name in sorted(before.keys() & after.keys()):
+        higher_is_better = next(
+            (direction for suffix, direction in _METRIC_DIRECTIONS if name.endswith(suffix)), None
+        )
+        old, new = before[name], after[name]
+        if higher_is_better is None or not old:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{name}: {old:g} -> {new:g} ({change:+.0%})")
+    return regressions
+
+
+def main(output: str = "ingestion-benchmark.json", **options):
+    """Run the suite (options as in run_suite) and print a short summary."""
+    results = run_suite(output=output, **options)
+    for mode, uploads in results["upload"].items():
+        for kind, upload in uploads.items():
+            print(
+                f"upload {kind} ({mode}): {upload['documents']} docs, {upload['docs_per_second']} docs/s, "
+                f"{upload['mb_per_second']} MB/s, peak payload {upload['peak_payload_bytes'] / 2**20:.1f} MB, "
+                f"RSS peak growth {upload['rss_peak_growth_bytes'] / 2**20:.1f} MB"
+            )
+    for kind, data_url in results["data_url"].items():
+        print(f"data_url {kind}: {data_url['mb_per_second']} MB/s, peak {data_url['peak_traced_bytes'] / 2**20:.1f} MB")
+    if isinstance(results["catalog"], dict):
+        print(f"catalog: skipped ({results['catalog']['skipped']})")
+    for entry in results["catalog"] if isinstance(results["catalog"], list) else []:
+        print(
+            f"catalog {entry['size']} docs: first page {_ms(entry['first_page_seconds'])}, "
+            f"deep page {_ms(entry['deep_page_seconds'])}, delete {_ms(entry['delete_documents_seconds'])}"
+        )
+    print(f"results written to {output}")
+
+
+def _ms(seconds: Optional[float]) -> str:
+    # Timings are None when there was nothing to time (e.g. fewer documents than one delete batch)
+    return f"{seconds * 1000:.1f}ms" if seconds is not None else "n/a"
+
+
+def compare_main(baseline: str, current: str, tolerance: float = 0.1):
+    """Print regressions between two result files; exits non-zero if there are any."""
+    regressions = compare(baseline, current, tolerance)
+    if not regressions:
+        print(f"no regressions beyond {tolerance:.0%}")
+        return
+    print("\n".join(regressions))
+    sys.exit(1)
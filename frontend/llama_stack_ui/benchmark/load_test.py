@@ -0,0 +1,260 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import json
+import math
+import os
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from llama_stack_ui.benchmark.fake_llamastack import FakeLlamaStack, FakeLlamaStackConfig
+from llama_stack_ui.distribution.ui.modules.api import ClientRegistry, LlamaStackApi
+from llama_stack_ui.distribution.ui.modules.context import context_window_for
+from llama_stack_ui.distribution.ui.modules.pipeline import TurnSettings, run_direct_turn
+from llama_stack_ui.distribution.ui.modules.streaming import StreamRenderer
+
+
+"""
+Headless load test of the direct-mode chat pipeline.
+
+Each simulated session runs chat turns back to back through the same
+retrieve/pack/generate code the chat page uses, with a placeholder that only
+counts rendered bytes instead of a browser. By default the turns go to a local
+FakeLlamaStack so the numbers reflect the UI pod itself; pass base_url to load
+a real LlamaStack instead.
+"""
+
+DEFAULT_QUESTIONS = [
+    "What does F5 Distributed Cloud protect against?",
+    "How is API discovery configured?",
+    "Which rate limiting options are available?",
+    "How do I enable bot defense for an application?",
+    "What is a web application firewall policy?",
+]
+
+
+class HeadlessPlaceholder:
+    """Stand-in for st.empty() that records what would be sent to the browser."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes_sent = 0
+
+    def markdown(self, text: str):
+        self.frames += 1
+        self.bytes_sent += len(text.encode("utf-8"))
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values, or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+@dataclass
+class LoadTestReport:
+    sessions: int = 0
+    turns: int = 0
+    failed_turns: int = 0
+    elapsed_seconds: float = 0.0
+    turns_per_second: float = 0.0
+    tokens_per_second: float = 0.0
+    ttft_p50: Optional[float] = None
+    ttft_p95: Optional[float] = None
+    ttft_p99: Optional[float] = None
+    turn_p50: Optional[float] = None
+    turn_p95: Optional[float] = None
+    turn_p99: Optional[float] = None
+    retrieval_p50: Optional[float] = None
+    retrieval_p95: Optional[float] = None
+    cpu_seconds: float = 0.0
+    cpu_utilization: float = 0.0
+    rss_start_bytes: int = 0
+    rss_end_bytes: int = 0
+    rss_peak_bytes: int = 0
+    rendered_bytes: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        def ms(value):
+            return f"{value * 1000:.0f}ms" if value is not None else "n/a"
+
+        return "\n".join([
+            f"sessions={self.sessions} turns={self.turns} failed={self.failed_turns} elapsed={self.elapsed_seconds:.1f}s",
+            f"throughput: {self.turns_per_second:.2f} turns/s, {self.tokens_per_second:.0f} tokens/s",
+            f"TTFT p50/p95/p99: {ms(self.ttft_p50)} / {ms(self.ttft_p95)} / {ms(self.ttft_p99)}",
+            f"turn latency p50/p95/p99: {ms(self.turn_p50)} / {ms(self.turn_p95)} / {ms(self.turn_p99)}",
+            f"retrieval p50/p95: {ms(self.retrieval_p50)} / {ms(self.retrieval_p95)}",
+            f"CPU: {self.cpu_seconds:.2f}s ({self.cpu_utilization:.0%} of one core)",
+            f"RSS: start {self.rss_start_bytes / 2**20:.1f} MB, end {self.rss_end_bytes / 2**20:.1f} MB, "
+            f"peak {self.rss_peak_bytes / 2**20:.1f} MB",
+        ])
+
+
+def run_load_test(
+    sessions: int = 8,
+    turns: int = 5,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    vector_db_ids: Optional[List[str]] = None,
+    questions: Optional[List[str]] = None,
+    unique_questions: bool = True,
+    settings: Optional[TurnSettings] = None,
+    think_time: float = 0.0,
+    fake_config: Optional[FakeLlamaStackConfig] = None,
+) -> LoadTestReport:
+    """
+    Drive the direct-mode pipeline from concurrent simulated sessions.
+
+    Args:
+        sessions: Concurrent chat sessions
+        turns: Turns per session
+        base_url: LlamaStack to load; a local FakeLlamaStack is started when None
+        model: Model identifier (first LLM of the server by default)
+        vector_db_ids: Collections to retrieve from (all of the server's by default)
+        questions: Prompts to cycle through
+        unique_questions: Tag each prompt with its session/turn so caches do not absorb the load
+        settings: Sampling and retrieval settings (chat page defaults otherwise)
+        think_time: Seconds a session waits between turns
+        fake_config: Latency profile of the fake server
+
+    Returns:
+        LoadTestReport: Throughput, latency percentiles, CPU and memory
+    """
+    fake_server = None
+    if base_url is None:
+        fake_server = FakeLlamaStack(fake_config).start()
+        base_url = fake_server.url
+
+    registry = ClientRegistry(max_size=2, idle_seconds=0)
+    api = LlamaStackApi(registry=registry)
+    api.base_url = base_url
+    try:
+        models = [m for m in api.list_models() if m.api_model_type == "llm"]
+        model_obj = next((m for m in models if m.identifier == model), models[0] if models else None)
+        if model_obj is None:
+            raise RuntimeError(f"no LLM model available at {base_url}")
+        if vector_db_ids is None:
+            vector_db_ids = [vector_db.identifier for vector_db in api.list_vector_dbs()]
+        settings = settings or TurnSettings(model=model_obj.identifier)
+        settings.model = model_obj.identifier
+        settings.context_window = context_window_for(model_obj)
+        questions = questions or DEFAULT_QUESTIONS
+
+        lock = threading.Lock()
+        latencies, placeholders, errors = [], [], []
+        rss_peak = [_rss_bytes()]
+
+        def run_session(session: int):
+            for turn in range(turns):
+                prompt = questions[(session + turn) % len(questions)]
+                if unique_questions:
+                    prompt = f"{prompt} (session {session}, turn {turn})"
+                placeholder = HeadlessPlaceholder()
+                debug_events = []
+                try:
+                    run_direct_turn(
+                        api, api.client, api.client, prompt, vector_db_ids, settings,
+                        StreamRenderer(placeholder), debug_events,
+                    )
+                    latency = debug_events[0]
+                except Exception as e:
+                    with lock:
+                        errors.append(f"session {session} turn {turn}: {e}")
+                    continue
+                with lock:
+                    latencies.append(latency)
+                    placeholders.append(placeholder)
+                    rss_peak[0] = max(rss_peak[0], _rss_bytes())
+                if think_time:
+                    time.sleep(think_time)
+
+        rss_start = _rss_bytes()
+        usage_start = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as executor:
+            list(executor.map(run_session, range(sessions)))
+        elapsed = time.perf_counter() - started
+        usage_end = resource.getrusage(resource.RUSAGE_SELF)
+    finally:
+        registry.close_all()
+        if fake_server is not None:
+            fake_server.stop()
+
+    cpu_seconds = (usage_end.ru_utime - usage_start.ru_utime) + (usage_end.ru_stime - usage_start.ru_stime)
+    ttfts = [event["time_to_first_token_s"] for event in latencies if event["time_to_first_token_s"] is not None]
+    totals = [event["total_s"] for event in latencies]
+    retrievals = [event["retrieval_s"] for event in latencies if event["retrieval_s"] is not None]
+    tokens = sum(event["completion_tokens"] or 0 for event in latencies)
+    return LoadTestReport(
+        sessions=sessions,
+        turns=len(latencies),
+        failed_turns=len(errors),
+        elapsed_seconds=elapsed,
+        turns_per_second=len(latencies) / elapsed if elapsed else 0.0,
+        tokens_per_second=tokens / elapsed if elapsed else 0.0,
+        ttft_p50=percentile(ttfts, 50),
+        ttft_p95=percentile(ttfts, 95),
+        ttft_p99=percentile(ttfts, 99),
+        turn_p50=percentile(totals, 50),
+        turn_p95=percentile(totals, 95),
+        turn_p99=percentile(totals, 99),
+        retrieval_p50=percentile(retrievals, 50),
+        retrieval_p95=percentile(retrievals, 95),
+        cpu_seconds=cpu_seconds,
+        cpu_utilization=cpu_seconds / elapsed if elapsed else 0.0,
+        rss_start_bytes=rss_start,
+        rss_end_bytes=_rss_bytes(),
+        rss_peak_bytes=max(rss_peak[0], _rss_bytes()),
+        rendered_bytes=sum(placeholder.bytes_sent for placeholder in placeholders),
+        errors=errors[:20],
+    )
+
+
+def main(
+    sessions: int = 8,
+    turns: int = 5,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    first_token_latency: float = 0.2,
+    tokens_per_second: float = 50.0,
+    response_tokens: int = 128,
+    rag_latency: float = 0.05,
+    temperature: float = 0.1,
+    max_tokens: int = 512,
+    json_output: bool = False,
+):
+    """
+    Run a load test and print the report.
+
+    The latency options shape the local fake server and are ignored with base_url.
+    """
+    fake_config = FakeLlamaStackConfig(
+        first_token_latency=first_token_latency,
+        tokens_per_second=tokens_per_second,
+        response_tokens=response_tokens,
+        rag_latency=rag_latency,
+    )
+    settings = TurnSettings(model=model or "", temperature=temperature, max_tokens=max_tokens)
+    report = run_load_test(
+        sessions=sessions, turns=turns, base_url=base_url, model=model, settings=settings, fake_config=fake_config
+    )
+    print(json.dumps(asdict(report), indent=2) if json_output else report.summary())
@@ -5,7 +5,15 @@
 # the root directory of this source tree.
 import streamlit as st
 
+from llama_stack_ui.distribution.ui.modules.metrics import start_metrics_server
+from llama_stack_ui.distribution.ui.modules.tracing import setup_tracing
+
 def main():
+    # Prometheus exporter on METRICS_PORT (once per process)
+    start_metrics_server()
+    # OpenTelemetry exporter selected by OTEL_TRACES_EXPORTER (off by default)
+    setup_tracing()
+
     # Define available pages: path and icon
     pages = {
         "Chat": ("page/playground/chat.py", "💬"),
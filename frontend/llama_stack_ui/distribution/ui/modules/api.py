@@ -4,17 +4,170 @@
 # This source code is licensed under the terms described in the LICENSE file in
 # the root directory of this source tree.
 
+import atexit
+import hashlib
+import json
 import os
-from typing import Optional, Tuple, List
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Tuple, List
 import requests
 
-from llama_stack_client import LlamaStackClient
+from llama_stack_client import DefaultHttpxClient, LlamaStackClient
+
+from llama_stack_ui.distribution.ui.modules import metrics, tracing
+from llama_stack_ui.distribution.ui.modules.cache import TTLCache
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of LlamaStackClient instances keyed by base URL.
+
+    Streamlit re-executes page scripts on every interaction, so creating a new
+    client per rerun throws away the underlying HTTP connection pool. All
+    sessions share the clients held here instead. Clients idle for longer than
+    ``idle_seconds`` are dropped, and at most ``max_size`` clients are kept
+    (least recently used first out).
+
+    Eviction only drops the registry's reference: a session or fan-out worker
+    may still be streaming through an evicted client, so its connection pool
+    is closed by garbage collection once the last holder releases it.
+    """
+
+    def __init__(self, max_size: int = 8, idle_seconds: float = 600.0):
+        self.max_size = max(1, max_size)
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # base_url -> [client, last_used_monotonic]
+        self._clients: "OrderedDict[str, list]" = OrderedDict()
+        self._stats = {"clients_created": 0, "clients_reused": 0, "clients_evicted": 0}
+
+    @staticmethod
+    def _normalize(base_url: str) -> str:
+        return base_url.rstrip("/")
+
+    def get(self, base_url: str) -> LlamaStackClient:
+        """Return the pooled client for base_url, creating it on first use."""
+        key = self._normalize(base_url)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._clients.move_to_end(key)
+                self._stats["clients_reused"] += 1
+                client = entry[0]
+            else:
+                client = self._create(key)
+                self._clients[key] = [client, now]
+                self._stats["clients_created"] += 1
+                while len(self._clients) > self.max_size:
+                    self._clients.popitem(last=False)
+                    self._stats["clients_evicted"] += 1
+        return client
+
+    @staticmethod
+    def _create(base_url: str) -> LlamaStackClient:
+        if tracing.setup_tracing():
+            # Propagate the trace context so llama-stack can join the trace
+            http_client = DefaultHttpxClient(event_hooks={"request": [tracing.inject_trace_headers]})
+            return LlamaStackClient(base_url=base_url, http_client=http_client)
+        return LlamaStackClient(base_url=base_url)
+
+    def _evict_idle(self, now: float):
+        """Drop clients idle past the threshold. Caller must hold the lock."""
+        if self.idle_seconds <= 0:
+            return
+        for key in [k for k, (_, last_used) in self._clients.items() if now - last_used > self.idle_seconds]:
+            del self._clients[key]
+            self._stats["clients_evicted"] += 1
+
+    @staticmethod
+    def _close(client: LlamaStackClient):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        """
+        Counters for clients created, reused and evicted, plus the current size.
+
+        These count LlamaStackClient instances handed out by the registry, not
+        TCP connections: httpx manages keep-alive connections inside each
+        client's pool and does not expose when a socket is opened or reused.
+        """
+        with self._lock:
+            return {**self._stats, "size": len(self._clients)}
+
+    def close_all(self):
+        """Close every registered client; only for shutdown, when no request is in flight."""
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            self._close(client)
+
+
+client_registry = ClientRegistry(
+    max_size=int(os.environ.get("LLAMA_STACK_CLIENT_POOL_SIZE", "8")),
+    idle_seconds=float(os.environ.get("LLAMA_STACK_CLIENT_IDLE_SECONDS", "600")),
+)
+atexit.register(client_registry.close_all)
+
+# Per-resource TTLs (seconds) for the shared catalog cache
+CATALOG_TTLS = {
+    "models": float(os.environ.get("CATALOG_TTL_MODELS", "300")),
+    "toolgroups": float(os.environ.get("CATALOG_TTL_TOOLGROUPS", "120")),
+    "tools": float(os.environ.get("CATALOG_TTL_TOOLS", "120")),
+    "vector_dbs": float(os.environ.get("CATALOG_TTL_VECTOR_DBS", "30")),
+    "providers": float(os.environ.get("CATALOG_TTL_PROVIDERS", "300")),
+}
+
+# Shared RAG result cache: entries expire after RAG_CACHE_TTL seconds and are
+# dropped early when documents of one of their collections change
+RAG_CACHE_SIZE = int(os.environ.get("RAG_CACHE_SIZE", "512"))
+RAG_CACHE_TTL = float(os.environ.get("RAG_CACHE_TTL", "600"))
+# Query each selected collection separately and merge by score
+RAG_PARALLEL_RETRIEVAL = os.environ.get("RAG_PARALLEL_RETRIEVAL", "false").lower() in ("1", "true", "yes")
+# Per-collection request timeout when collections are queried in parallel
+RAG_COLLECTION_TIMEOUT = float(os.environ.get("RAG_COLLECTION_TIMEOUT", "10"))
+
+# Opt-in cache of greedy (deterministic) chat completions
+COMPLETION_CACHE_ENABLED = os.environ.get("COMPLETION_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+COMPLETION_CACHE_SIZE = int(os.environ.get("COMPLETION_CACHE_SIZE", "256"))
+COMPLETION_CACHE_TTL = float(os.environ.get("COMPLETION_CACHE_TTL", "3600"))
+
+# Per-call timeout (seconds) for concurrent tools.list fan-out across toolgroups
+TOOLS_LIST_TIMEOUT = float(os.environ.get("TOOLS_LIST_TIMEOUT", "5"))
+
+# Rows per scoring.score request and batches in flight for batch scoring
+SCORING_BATCH_SIZE = int(os.environ.get("SCORING_BATCH_SIZE", "16"))
+SCORING_CONCURRENCY = int(os.environ.get("SCORING_CONCURRENCY", "4"))
+
+# Shared worker pool for fanning out independent llama-stack calls
+_fanout_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("LLAMA_STACK_FANOUT_WORKERS", "16")),
+    thread_name_prefix="llamastack-fanout",
+)
+
 
 class LlamaStackApi:
-    def __init__(self):
-        self.client = LlamaStackClient(
-            base_url=os.environ.get("LLAMA_STACK_ENDPOINT", "http://localhost:8321")
-        )
+    def __init__(self, registry: ClientRegistry = client_registry):
+        self.registry = registry
+        self.base_url = os.environ.get("LLAMA_STACK_ENDPOINT", "http://localhost:8321")
+        # One cache per catalog resource, shared by all sessions in the process
+        self.catalog = {resource: TTLCache(max_size=64, default_ttl=ttl) for resource, ttl in CATALOG_TTLS.items()}
+        self.rag_cache = TTLCache(max_size=RAG_CACHE_SIZE, default_ttl=RAG_CACHE_TTL)
+        self.completion_cache = TTLCache(max_size=COMPLETION_CACHE_SIZE, default_ttl=COMPLETION_CACHE_TTL)
+
+    @property
+    def client(self) -> LlamaStackClient:
+        """Pooled client for the default LLAMA_STACK_ENDPOINT"""
+        return self.registry.get(self.base_url)
 
     def run_scoring(self, row, scoring_function_ids: list[str], scoring_params: Optional[dict]):
         """Run scoring on a single row"""
@@ -22,9 +175,341 @@ class LlamaStackApi:
             scoring_params = {fn_id: None for fn_id in scoring_function_ids}
         return self.client.scoring.score(input_rows=[row], scoring_functions=scoring_params)
 
+    def run_scoring_batch(
+        self,
+        rows: List[dict],
+        scoring_function_ids: List[str],
+        scoring_params: Optional[dict] = None,
+        client: Optional[LlamaStackClient] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        ordered: bool = False,
+    ) -> Iterator[Tuple[int, Dict[str, dict], Optional[str]]]:
+        """
+        Score many rows with batched scoring.score requests, yielding rows as their batch completes.
+
+        Rows are sent batch_size at a time with at most concurrency batches in
+        flight on the shared fan-out pool. A batch whose request fails is
+        retried row by row, so one bad row does not fail its neighbours.
+
+        Args:
+            rows: Scoring input rows
+            scoring_function_ids: Scoring functions to apply to every row
+            scoring_params: scoring function id -> params, None for the defaults
+            batch_size: Rows per request (SCORING_BATCH_SIZE by default)
+            concurrency: Batches in flight (SCORING_CONCURRENCY by default)
+            ordered: Yield rows in input order instead of completion order
+
+        Yields:
+            Tuple[int, Dict[str, dict], Optional[str]]:
+            (row index, {scoring function id: score row}, error message or None)
+        """
+        client = client or self.client
+        if not scoring_params:
+            scoring_params = {fn_id: None for fn_id in scoring_function_ids}
+        batch_size = max(1, batch_size or SCORING_BATCH_SIZE)
+        concurrency = max(1, concurrency or SCORING_CONCURRENCY)
+        batches = iter(range(0, len(rows), batch_size))
+        score_batch = tracing.bind_context(self._score_batch)
+
+        pending, buffered, next_index = set(), {}, 0
+        try:
+            while True:
+                # Keep the window of in-flight batches full
+                for start in batches:
+                    pending.add(_fanout_executor.submit(score_batch, client, rows, start, batch_size, scoring_params))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        if not ordered:
+                            yield result
+                        else:
+                            buffered[result[0]] = result
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            # The caller stopped early: drop batches that have not started
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def _score_batch(
+        client: LlamaStackClient, rows: List[dict], start: int, batch_size: int, scoring_params: dict
+    ) -> List[Tuple[int, Dict[str, dict], Optional[str]]]:
+        """Score rows[start:start + batch_size], falling back to one request per row if the batch fails."""
+        batch = rows[start:start + batch_size]
+        with tracing.span("scoring.score", rows=len(batch), functions=list(scoring_params)):
+            try:
+                response = client.scoring.score(input_rows=batch, scoring_functions=scoring_params)
+            except Exception as e:
+                if len(batch) == 1:
+                    return [(start, {}, str(e))]
+                return [
+                    result
+                    for index in range(start, start + len(batch))
+                    for result in LlamaStackApi._score_batch(client, rows, index, 1, scoring_params)
+                ]
+        results = []
+        for offset in range(len(batch)):
+            scores = {
+                fn_id: result.score_rows[offset]
+                for fn_id, result in response.results.items()
+                if offset < len(result.score_rows)
+            }
+            missing = [fn_id for fn_id in response.results if fn_id not in scores]
+            error = f"no score returned by {', '.join(missing)}" if missing else None
+            results.append((start + offset, scores, error))
+        return results
+
     def create_client_with_url(self, base_url: str) -> LlamaStackClient:
-        """Create a LlamaStackClient with custom base URL"""
-        return LlamaStackClient(base_url=base_url)
+        """Get the pooled LlamaStackClient for a custom base URL"""
+        return self.registry.get(base_url)
+
+    def client_stats(self) -> dict:
+        """Client registry counters (clients_created, clients_reused, clients_evicted, size)"""
+        return self.registry.stats()
+
+    def endpoint_key(self, client: Optional[LlamaStackClient] = None) -> str:
+        """Normalized base URL of client (default: LLAMA_STACK_ENDPOINT), as used in cache keys"""
+        return str(getattr(client, "base_url", None) or self.base_url).rstrip("/")
+
+    def _catalog_lookup(self, resource: str, client: Optional[LlamaStackClient], loader, *args, refresh: bool = False):
+        """Serve a catalog listing from the shared cache, loading it on a miss."""
+        client = client or self.client
+        cache = self.catalog[resource]
+        key = (self.endpoint_key(client), *args)
+        metrics.CATALOG_LOOKUPS.labels(resource).inc()
+
+        def load():
+            metrics.CATALOG_BACKEND_CALLS.labels(resource).inc()
+            with tracing.span(f"catalog.{resource}", endpoint=key[0]):
+                return loader(client)
+
+        if refresh:
+            value = load()
+            cache.set(key, value)
+            return value
+        return cache.get_or_load(key, load)
+
+    def list_models(self, client: Optional[LlamaStackClient] = None, refresh: bool = False) -> List:
+        """List models, cached per endpoint for CATALOG_TTL_MODELS seconds"""
+        return self._catalog_lookup("models", client, lambda c: c.models.list(), refresh=refresh)
+
+    def list_toolgroups(self, client: Optional[LlamaStackClient] = None, refresh: bool = False) -> List:
+        """List toolgroups, cached per endpoint for CATALOG_TTL_TOOLGROUPS seconds"""
+        return self._catalog_lookup("toolgroups", client, lambda c: c.toolgroups.list(), refresh=refresh)
+
+    def list_tools(
+        self,
+        toolgroup_id: str,
+        client: Optional[LlamaStackClient] = None,
+        refresh: bool = False,
+        timeout: Optional[float] = None,
+    ) -> List:
+        """List the tools of a toolgroup, cached per endpoint and toolgroup"""
+        request_options = {"timeout": timeout} if timeout else {}
+        return self._catalog_lookup(
+            "tools",
+            client,
+            lambda c: c.tools.list(toolgroup_id=toolgroup_id, **request_options),
+            toolgroup_id,
+            refresh=refresh,
+        )
+
+    def list_tools_for_toolgroups(
+        self,
+        toolgroup_ids: List[str],
+        client: Optional[LlamaStackClient] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Dict[str, List], Dict[str, str]]:
+        """
+        List tools for several toolgroups concurrently.
+
+        Each toolgroup is fetched on the shared fan-out pool with its own
+        request timeout, so one slow MCP server does not hold up the others.
+        Lookups still running when the timeout expires are reported as errors;
+        they keep running in the background and fill the catalog cache for the
+        next rerun.
+
+        Returns:
+            Tuple[Dict[str, List], Dict[str, str]]:
+            (tools_by_toolgroup, error_by_toolgroup), both in toolgroup_ids order
+        """
+        client = client or self.client
+        timeout = TOOLS_LIST_TIMEOUT if timeout is None else timeout
+        futures = {
+            toolgroup_id: _fanout_executor.submit(tracing.bind_context(self.list_tools), toolgroup_id, client, False, timeout)
+            for toolgroup_id in dict.fromkeys(toolgroup_ids)
+        }
+        done, _ = wait(futures.values(), timeout=timeout)
+
+        tools_by_toolgroup, errors = {}, {}
+        for toolgroup_id, future in futures.items():
+            if future not in done:
+                errors[toolgroup_id] = f"timed out after {timeout:g}s"
+                continue
+            try:
+                tools_by_toolgroup[toolgroup_id] = future.result()
+            except Exception as e:
+                errors[toolgroup_id] = str(e)
+        return tools_by_toolgroup, errors
+
+    def list_vector_dbs(self, client: Optional[LlamaStackClient] = None, refresh: bool = False) -> List:
+        """List vector databases, cached per endpoint for CATALOG_TTL_VECTOR_DBS seconds"""
+        return self._catalog_lookup("vector_dbs", client, lambda c: c.vector_dbs.list(), refresh=refresh)
+
+    def list_providers(self, client: Optional[LlamaStackClient] = None, refresh: bool = False) -> List:
+        """List providers, cached per endpoint for CATALOG_TTL_PROVIDERS seconds"""
+        return self._catalog_lookup("providers", client, lambda c: c.providers.list(), refresh=refresh)
+
+    def invalidate_catalog(self, resource: Optional[str] = None):
+        """Drop cached listings for one resource, or for all resources when None"""
+        for name, cache in self.catalog.items():
+            if resource is None or name == resource:
+                cache.invalidate()
+
+    def catalog_stats(self) -> dict:
+        """Hit/miss statistics per catalog resource"""
+        return {resource: cache.stats() for resource, cache in self.catalog.items()}
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.split()).casefold()
+
+    def query_rag(
+        self,
+        query: str,
+        vector_db_ids: List[str],
+        client: Optional[LlamaStackClient] = None,
+        refresh: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Tuple[object, bool]:
+        """
+        Run a RAG query, serving repeated queries from the shared result cache.
+
+        Results are keyed by endpoint, normalized query text (whitespace
+        collapsed, case folded) and the sorted vector database IDs, so the same
+        question against the same collections is answered once for all sessions.
+
+        Returns:
+            Tuple[object, bool]: (RAG query result, served_from_cache)
+        """
+        client = client or self.client
+        key = (self.endpoint_key(client), self._normalize_query(query), tuple(sorted(set(vector_db_ids))))
+        if not refresh:
+            cached = self.rag_cache.get(key)
+            if cached is not None:
+                metrics.RAG_CACHE_LOOKUPS.labels("hit").inc()
+                return cached, True
+            metrics.RAG_CACHE_LOOKUPS.labels("miss").inc()
+        request_options = {"timeout": timeout} if timeout else {}
+        with metrics.RAG_QUERY_SECONDS.labels(metrics.collections_label(len(key[2]))).time(), tracing.span(
+            "rag_tool.query", endpoint=key[0], vector_db_ids=list(key[2])
+        ):
+            result = client.tool_runtime.rag_tool.query(content=query, vector_db_ids=list(key[2]), **request_options)
+        self.rag_cache.set(key, result)
+        return result, False
+
+    def query_rag_per_collection(
+        self,
+        query: str,
+        vector_db_ids: List[str],
+        client: Optional[LlamaStackClient] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Dict[str, object], Dict[str, str], Dict[str, bool]]:
+        """
+        Run one RAG query per collection concurrently.
+
+        Each collection is queried on the shared fan-out pool with its own
+        timeout and cached separately, so a slow or failing collection only
+        drops its own results. Queries still running at the timeout are
+        reported as errors and fill the cache in the background.
+
+        Returns:
+            Tuple[Dict[str, object], Dict[str, str], Dict[str, bool]]:
+            (result_by_vector_db, error_by_vector_db, cache_hit_by_vector_db),
+            all in vector_db_ids order; cache hits cover the answered collections
+        """
+        client = client or self.client
+        timeout = RAG_COLLECTION_TIMEOUT if timeout is None else timeout
+        futures = {
+            vector_db_id: _fanout_executor.submit(tracing.bind_context(self.query_rag), query, [vector_db_id], client, False, timeout)
+            for vector_db_id in dict.fromkeys(vector_db_ids)
+        }
+        done, _ = wait(futures.values(), timeout=timeout)
+
+        results, errors, cache_hits = {}, {}, {}
+        for vector_db_id, future in futures.items():
+            if future not in done:
+                errors[vector_db_id] = f"timed out after {timeout:g}s"
+                continue
+            try:
+                results[vector_db_id], cache_hits[vector_db_id] = future.result()
+            except Exception as e:
+                errors[vector_db_id] = str(e)
+        return results, errors, cache_hits
+
+    def invalidate_rag_cache(self, vector_db_id: Optional[str] = None) -> int:
+        """
+        Drop cached RAG results that searched vector_db_id (all results when None).
+
+        Returns:
+            int: Number of cached results removed
+        """
+        if vector_db_id is None:
+            return self.rag_cache.invalidate()
+        return self.rag_cache.invalidate(lambda key: vector_db_id in key[2])
+
+    def rag_cache_stats(self) -> dict:
+        """Hit/miss statistics of the RAG result cache"""
+        return self.rag_cache.stats()
+
+    def completion_cache_key(
+        self,
+        model_id: str,
+        messages: List[dict],
+        sampling_params: dict,
+        client: Optional[LlamaStackClient] = None,
+    ) -> Optional[str]:
+        """
+        Cache key for a chat completion, or None if its output is not deterministic.
+
+        Only greedy sampling is cacheable; the key covers the endpoint, model,
+        messages (system prompt, retrieved context and query) and all sampling
+        parameters.
+        """
+        strategy = (sampling_params or {}).get("strategy") or {}
+        if strategy.get("type") != "greedy":
+            return None
+        payload = json.dumps(
+            {
+                "endpoint": self.endpoint_key(client),
+                "model_id": model_id,
+                "messages": messages,
+                "sampling_params": sampling_params,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_cached_completion(self, key: Optional[str]) -> Optional[str]:
+        """Return the cached response text for key, or None"""
+        return self.completion_cache.get(key) if key else None
+
+    def cache_completion(self, key: Optional[str], text: str):
+        """Store a complete response text under key"""
+        if key and text:
+            self.completion_cache.set(key, text)
+
+    def completion_cache_stats(self) -> dict:
+        """Hit/miss statistics of the completion cache"""
+        return self.completion_cache.stats()
 
     def validate_llamastack_endpoint(self, url: str) -> Tuple[bool, Optional[List], Optional[str]]:
         """
@@ -42,11 +527,12 @@ class LlamaStackApi:
             if not url.startswith(('http://', 'https://')):
                 return False, None, "XC URL must start with http:// or https://"
             
-            # Create client with custom URL
+            # Get the pooled client for this URL
             client = self.create_client_with_url(url)
             
-            # Try to fetch models - this will fail if not a LlamaStack endpoint
-            models = client.models.list()
+            # Try to fetch models - this will fail if not a LlamaStack endpoint.
+            # Always go to the server here, then refresh the shared cache.
+            models = self.list_models(client, refresh=True)
             
             if not models:
                 return False, None, "XC URL must be a LlamaStack endpoint"
@@ -0,0 +1,143 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+"""
+Thread-safe in-process caches shared by every Streamlit session of the pod.
+"""
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a time-to-live.
+
+    Each entry may carry its own TTL; otherwise ``default_ttl`` applies.
+    Hits, misses, expirations and evictions are counted so callers can report
+    cache effectiveness. ``get_or_load`` is single-flight: concurrent misses on
+    the same key wait for one loader call instead of each issuing their own.
+    """
+
+    def __init__(self, max_size: int = 256, default_ttl: float = 60.0):
+        self.max_size = max(1, max_size)
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        # key -> (expires_at_monotonic, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "invalidated": 0, "coalesced": 0}
+        # key -> Future of the load currently running for it
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Return the live value for key or _MISSING. Caller must hold the lock."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            del self._entries[key]
+            self._stats["expired"] += 1
+        self._stats["misses"] += 1
+        return _MISSING
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]):
+        """Insert value and evict past max_size. Caller must hold the lock."""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evicted"] += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if absent or expired."""
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value under key for ttl seconds (default_ttl when None)."""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value for key, calling loader() to fill it on a miss.
+
+        Only one loader runs per key at a time: other callers missing on the
+        same key block on its result (or its exception) instead of loading
+        again. Exceptions are not cached. A load overtaken by invalidate()
+        still returns its value to the waiting callers but does not store it.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._inflight[key] = flight
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return flight.result()
+
+        try:
+            value = loader()
+        except BaseException as exc:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.set_exception(exc)
+            raise
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+                self._store(key, value, ttl)
+        flight.set_result(value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop entries whose key matches predicate (all entries when None).
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            if predicate is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            # Loads already running for matching keys must not store what
+            # they read before the invalidation
+            for key in [key for key in self._inflight if predicate is None or predicate(key)]:
+                del self._inflight[key]
+            self._stats["invalidated"] += len(keys)
+            return len(keys)
+
+    def stats(self) -> dict:
+        """Counters plus current size and hit rate."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "hit_rate": (self._stats["hits"] / lookups) if lookups else 0.0,
+            }
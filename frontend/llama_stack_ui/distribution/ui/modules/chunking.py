@@ -0,0 +1,118 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+
+"""
+Client-side text extraction and chunking for document ingestion.
+
+Extraction (txt, pdf, docx) and chunking run on a process pool so CPU-heavy
+parsing does not compete with the Streamlit server threads. Workers read the
+document from a file path rather than receiving its bytes, so file content is
+not pickled into the worker's call queue. PDF and DOCX
+support use the optional ``pypdf`` and ``python-docx`` packages; when they are
+missing, extract_and_chunk raises UnsupportedDocumentError and the caller
+falls back to server-side ingestion for that file.
+
+Token counts are approximated by whitespace-separated words.
+"""
+
+CHUNKING_WORKERS = int(os.environ.get("CHUNKING_WORKERS", "2"))
+
+
+class UnsupportedDocumentError(Exception):
+    """The document type cannot be extracted in the UI pod."""
+
+
+def _extract_pdf(path: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedDocumentError("pypdf is not installed")
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _extract_docx(path: str) -> str:
+    try:
+        import docx
+    except ImportError:
+        raise UnsupportedDocumentError("python-docx is not installed")
+    document = docx.Document(path)
+    return "\n".join(paragraph.text for paragraph in document.paragraphs)
+
+
+def extract_text(filename: str, path: str) -> str:
+    """Extract plain text from a txt, pdf or docx file stored at path; filename decides the type."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".txt":
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    if extension == ".pdf":
+        return _extract_pdf(path)
+    if extension == ".docx":
+        return _extract_docx(path)
+    raise UnsupportedDocumentError(f"no extractor for '{extension}' files")
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int) -> List[Tuple[str, int]]:
+    """
+    Split text into windows of chunk_size tokens overlapping by overlap tokens.
+
+    Returns:
+        List[Tuple[str, int]]: (chunk_text, token_count) pairs
+    """
+    words = text.split()
+    chunk_size = max(1, chunk_size)
+    step = max(1, chunk_size - max(0, overlap))
+    chunks = []
+    for start in range(0, len(words), step):
+        window = words[start:start + chunk_size]
+        chunks.append((" ".join(window), len(window)))
+        if start + chunk_size >= len(words):
+            break
+    return chunks
+
+
+def extract_and_chunk(filename: str, path: str, chunk_size: int, overlap: int) -> dict:
+    """
+    Extract and chunk one document read from path; runs in a worker process.
+
+    Returns:
+        dict: {"chunks": [(text, token_count), ...], "extract_seconds": float, "chunk_seconds": float}
+    """
+    started = time.perf_counter()
+    text = extract_text(filename, path)
+    extracted = time.perf_counter()
+    chunks = chunk_text(text, chunk_size, overlap)
+    return {
+        "chunks": chunks,
+        "extract_seconds": extracted - started,
+        "chunk_seconds": time.perf_counter() - extracted,
+    }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Shared process pool, created on first use with the spawn start method."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, not fork: the Streamlit server process is multi-threaded
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, CHUNKING_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
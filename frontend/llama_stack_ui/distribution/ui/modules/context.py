@@ -0,0 +1,255 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+"""
+Token-budgeted packing of retrieved RAG chunks into prompt context.
+"""
+
+# Context window assumed when the model metadata does not report one
+DEFAULT_CONTEXT_WINDOW = int(os.environ.get("MODEL_CONTEXT_WINDOW", "8192"))
+# Optional hard cap on context tokens (0 = limited by the context window only)
+RAG_CONTEXT_MAX_TOKENS = int(os.environ.get("RAG_CONTEXT_MAX_TOKENS", "0"))
+# Tokens kept free for chat template and special tokens
+CONTEXT_SAFETY_MARGIN = int(os.environ.get("RAG_CONTEXT_SAFETY_MARGIN", "256"))
+# Shortest word overlap between two chunks of a document that is stripped
+MIN_OVERLAP_WORDS = 8
+# A chunk that does not fit is cut down only if this many tokens remain
+MIN_PARTIAL_TOKENS = 32
+# Chunks each collection may contribute when collections are queried separately
+RAG_COLLECTION_TOP_K = int(os.environ.get("RAG_COLLECTION_TOP_K", "3"))
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+RAG_PROMPT_TEMPLATE = "Please answer the following query using the context below.\n\nCONTEXT:\n{context}\n\nQUERY:\n{query}"
+NO_CONTEXT_PROMPT_TEMPLATE = "Please answer the following query. \n\nQUERY:\n{query}"
+
+_CONTEXT_WINDOW_KEYS = ("context_length", "context_window", "max_model_len", "max_position_embeddings")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def context_window_for(model) -> int:
+    """
+    Context window of a model, read from its metadata when available.
+
+    Args:
+        model: Model object from models.list(), or None
+
+    Returns:
+        int: Context window in tokens
+    """
+    metadata = getattr(model, "metadata", None) or {}
+    for key in _CONTEXT_WINDOW_KEYS:
+        try:
+            value = int(metadata.get(key) or 0)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            return value
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def context_budget(context_window: int, max_tokens: int, prompt_text: str) -> int:
+    """
+    Tokens available for retrieved context.
+
+    The budget is what is left of the context window after the completion
+    (max_tokens), the rest of the prompt and a safety margin, further capped by
+    RAG_CONTEXT_MAX_TOKENS when set.
+    """
+    budget = context_window - max_tokens - estimate_tokens(prompt_text) - CONTEXT_SAFETY_MARGIN
+    if RAG_CONTEXT_MAX_TOKENS > 0:
+        budget = min(budget, RAG_CONTEXT_MAX_TOKENS)
+    return max(0, budget)
+
+
+@dataclass
+class RetrievedChunk:
+    text: str
+    document_id: Optional[str] = None
+    score: float = 0.0
+
+
+@dataclass
+class PackedContext:
+    """Retrieved context trimmed to a token budget, with packing statistics."""
+
+    text: str = ""
+    chunks: List[RetrievedChunk] = field(default_factory=list)
+    budget_tokens: int = 0
+    raw_tokens: int = 0
+    packed_tokens: int = 0
+    raw_chunks: int = 0
+    duplicates_removed: int = 0
+    overlaps_trimmed: int = 0
+    dropped_chunks: int = 0
+    truncated: bool = False
+
+    def debug_event(self) -> dict:
+        """Packing statistics in the shape of a chat debug event"""
+        return {
+            "type": "rag_context_packing",
+            "budget_tokens": self.budget_tokens,
+            "raw_tokens": self.raw_tokens,
+            "packed_tokens": self.packed_tokens,
+            "raw_chunks": self.raw_chunks,
+            "packed_chunks": len(self.chunks),
+            "duplicates_removed": self.duplicates_removed,
+            "overlaps_trimmed": self.overlaps_trimmed,
+            "dropped_chunks": self.dropped_chunks,
+            "truncated": self.truncated,
+        }
+
+
+def _text_of(item) -> str:
+    return item if isinstance(item, str) else str(getattr(item, "text", "") or "")
+
+
+def chunks_from_rag_result(rag_result) -> List[RetrievedChunk]:
+    """
+    Retrieved chunks of a rag_tool.query() result, in retrieval order.
+
+    Uses the chunk texts and scores from the result metadata; falls back to the
+    "Result N" content items when the metadata does not carry them.
+    """
+    metadata = getattr(rag_result, "metadata", None) or {}
+    texts = metadata.get("chunks") or []
+    if texts:
+        document_ids = metadata.get("document_ids") or []
+        scores = metadata.get("scores") or []
+        return [
+            RetrievedChunk(
+                text=_text_of(text),
+                document_id=document_ids[i] if i < len(document_ids) else None,
+                score=float(scores[i]) if i < len(scores) and scores[i] is not None else 0.0,
+            )
+            for i, text in enumerate(texts)
+        ]
+
+    content = getattr(rag_result, "content", None) or []
+    if isinstance(content, str):
+        content = [content]
+    items = [_text_of(item) for item in content]
+    results = [text for text in items if text.startswith("Result ")] or [text for text in items if text.strip()]
+    # Earlier results rank higher
+    return [RetrievedChunk(text=text, score=float(len(results) - i)) for i, text in enumerate(results)]
+
+
+def merge_collection_results(results_by_vector_db: dict, top_k_per_collection: int) -> List[RetrievedChunk]:
+    """
+    Merge per-collection rag_tool.query() results by score.
+
+    Each collection contributes at most top_k_per_collection of its best
+    chunks, so one large collection cannot crowd out the others.
+
+    Args:
+        results_by_vector_db (dict): vector_db_id -> RAG query result
+        top_k_per_collection (int): Chunk quota per collection
+
+    Returns:
+        List[RetrievedChunk]: Chunks of all collections, best score first
+    """
+    merged = []
+    for rag_result in results_by_vector_db.values():
+        chunks = sorted(chunks_from_rag_result(rag_result), key=lambda chunk: chunk.score, reverse=True)
+        merged.extend(chunks[:max(1, top_k_per_collection)])
+    return sorted(merged, key=lambda chunk: chunk.score, reverse=True)
+
+
+def _overlap_words(previous: List[str], current: List[str]) -> int:
+    """Length of the longest suffix of previous that is a prefix of current."""
+    for size in range(min(len(previous), len(current)), MIN_OVERLAP_WORDS - 1, -1):
+        if previous[-size:] == current[:size]:
+            return size
+    return 0
+
+
+def pack_context(chunks: List[RetrievedChunk], budget_tokens: int) -> PackedContext:
+    """
+    Deduplicate, rank and trim retrieved chunks to fit budget_tokens.
+
+    Chunks are ordered by score. Exact and contained duplicates are dropped,
+    and words that a chunk shares with a higher-ranked chunk of the same
+    document (chunking overlap) are stripped. Chunks are then added until the
+    budget is spent; the first chunk that does not fit is cut to the remaining
+    budget if a useful amount is left.
+    """
+    packed = PackedContext(
+        budget_tokens=budget_tokens,
+        raw_chunks=len(chunks),
+        raw_tokens=sum(estimate_tokens(chunk.text) for chunk in chunks),
+    )
+
+    ranked = sorted(chunks, key=lambda chunk: chunk.score, reverse=True)
+    kept, kept_words, kept_normalized = [], [], []
+    for chunk in ranked:
+        words = chunk.text.split()
+        normalized = " ".join(words)
+        if not normalized or any(normalized in other for other in kept_normalized):
+            packed.duplicates_removed += 1
+            continue
+        for other, other_words in zip(kept, kept_words):
+            if chunk.document_id is None or other.document_id != chunk.document_id:
+                continue
+            # Either the chunk continues the other one or leads into it
+            head = _overlap_words(other_words, words)
+            tail = 0 if head else _overlap_words(words, other_words)
+            if head or tail:
+                words = words[head:len(words) - tail]
+                packed.overlaps_trimmed += 1
+        if not words:
+            packed.duplicates_removed += 1
+            continue
+        kept.append(RetrievedChunk(text=" ".join(words), document_id=chunk.document_id, score=chunk.score))
+        kept_words.append(words)
+        kept_normalized.append(normalized)
+
+    sections, used = [], 0
+    for index, chunk in enumerate(kept):
+        header = f"[{len(sections) + 1}]" + (f" (source: {chunk.document_id})" if chunk.document_id else "")
+        section = f"{header}\n{chunk.text}"
+        cost = estimate_tokens(section) + 1
+        if used + cost > budget_tokens:
+            remaining = budget_tokens - used - estimate_tokens(header) - 1
+            if remaining >= MIN_PARTIAL_TOKENS:
+                # Cut on a word boundary to roughly the remaining tokens
+                text = chunk.text[:remaining * 4].rsplit(" ", 1)[0]
+                section = f"{header}\n{text} …"
+                sections.append(section)
+                packed.chunks.append(RetrievedChunk(text=text, document_id=chunk.document_id, score=chunk.score))
+                used += estimate_tokens(section) + 1
+                packed.truncated = True
+                index += 1
+            packed.dropped_chunks = len(kept) - index
+            break
+        sections.append(section)
+        packed.chunks.append(chunk)
+        used += cost
+
+    packed.text = "\n\n".join(sections)
+    packed.packed_tokens = estimate_tokens(packed.text)
+    return packed
+
+
+def build_direct_messages(system_prompt: str, query: str, context: Optional[str]) -> List[dict]:
+    """
+    Chat messages sent in direct mode for a query and its packed context.
+
+    Returns:
+        List[dict]: System message followed by the user message
+    """
+    if context:
+        user_prompt = RAG_PROMPT_TEMPLATE.format(context=context, query=query)
+    else:
+        user_prompt = NO_CONTEXT_PROMPT_TEMPLATE.format(query=query)
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
@@ -0,0 +1,582 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from llama_stack_client import (
+    APIConnectionError,
+    APIStatusError,
+    InternalServerError,
+    LlamaStackClient,
+    RAGDocument,
+    RateLimitError,
+)
+
+from llama_stack_ui.distribution.ui.modules import metrics, tracing
+from llama_stack_ui.distribution.ui.modules.chunking import extract_and_chunk, get_executor as get_chunking_executor
+from llama_stack_ui.distribution.ui.modules.utils import data_url_from_file, iter_file_chunks
+
+
+"""
+Document ingestion into vector databases.
+
+Uploads are split into batches of INGEST_BATCH_SIZE documents that are
+inserted concurrently by up to INGEST_WORKERS threads. Each batch builds its
+request payload inside its worker, so memory use is bounded by
+workers x batch size documents rather than the whole selection. Transient
+failures are retried with exponential backoff. Retrying the same batch is
+idempotent: llama-stack's pgvector provider derives chunk ids from the
+document id and the chunk's position in the request, and upserts on them. A
+batch that still fails is split into single documents so one bad file does
+not fail its neighbours - but only when the failed request cannot have
+stored anything, since single-document requests produce different chunk
+ids. Otherwise its files are reported in UploadStats.partial.
+
+Two upload modes exist:
+
+- ``inline`` (default): the file is base64-encoded in chunks into a data URL
+  and embedded in the rag_tool.insert request. The UI pod holds roughly 2.7x
+  the size of every document in flight, so memory grows with file size.
+  Files larger than RAG_INLINE_MAX_BYTES (when set) go through the Files API.
+- ``files``: the file object is streamed to the llama-stack Files API and the
+  document references it by URL, so no encoded copy is held by the UI pod.
+  Requires a files provider on the llama-stack server.
+
+With client-side chunking enabled (ChunkingSettings.client_side), txt, pdf
+and docx files are extracted and chunked on a process pool in the UI pod
+and inserted pre-chunked through vector_io.insert; llama-stack then only
+computes embeddings. Files that cannot be extracted locally fall back to
+server-side ingestion.
+"""
+
+UPLOAD_MODE = os.environ.get("RAG_UPLOAD_MODE", "inline")
+# Largest file embedded as a data URL in inline mode; 0 means no limit
+INLINE_MAX_BYTES = int(os.environ.get("RAG_INLINE_MAX_BYTES", "0"))
+
+# URL llama-stack fetches uploaded file content from in "files" mode
+FILES_CONTENT_URL = os.environ.get(
+    "RAG_FILES_CONTENT_URL", "{base_url}/v1/openai/v1/files/{file_id}/content"
+)
+
+DEFAULT_CHUNK_SIZE_IN_TOKENS = int(os.environ.get("CHUNK_SIZE_IN_TOKENS", "512"))
+DEFAULT_CHUNK_OVERLAP_IN_TOKENS = int(os.environ.get("CHUNK_OVERLAP_IN_TOKENS", "64"))
+CLIENT_CHUNKING = os.environ.get("CLIENT_CHUNKING", "false").lower() == "true"
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "4"))
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "4"))
+INGEST_MAX_RETRIES = int(os.environ.get("INGEST_MAX_RETRIES", "3"))
+INGEST_RETRY_BACKOFF = float(os.environ.get("INGEST_RETRY_BACKOFF", "1.0"))
+
+# Errors worth retrying: network failures, timeouts, 429 and 5xx responses
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Failures raised before the request was sent
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _may_have_stored(error: Exception) -> bool:
+    """Whether a failed insert request may have been partly processed by the server."""
+    if isinstance(error, APIStatusError):
+        # 4xx are rejected up front; 503 comes from a server not taking requests
+        return error.status_code >= 500 and error.status_code != 503
+    if isinstance(error, APIConnectionError):
+        return not isinstance(error.__cause__, _UNSENT_ERRORS)
+    # Raised in the UI pod while building the request
+    return False
+
+
+def max_rss_bytes() -> int:
+    """Process high-water RSS mark (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class UploadStats:
+    """Counters, throughput and memory accounting for one upload."""
+
+    documents: int = 0
+    failed: int = 0
+    bytes_read: int = 0
+    batches: int = 0
+    retries: int = 0
+    elapsed_seconds: float = 0.0
+    # Largest request payload the UI pod built for a single batch
+    peak_payload_bytes: int = 0
+    # Growth of the process RSS high-water mark during the upload
+    rss_peak_growth_bytes: int = 0
+    mode: str = UPLOAD_MODE
+    # filename -> error message for documents that could not be inserted
+    errors: Dict[str, str] = field(default_factory=dict)
+    # Failed documents whose insert may have stored some of their chunks
+    partial: List[str] = field(default_factory=list)
+    # Seconds spent per ingestion stage, summed over workers
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.documents} document(s) in {self.elapsed_seconds:.1f}s "
+            f"({self.docs_per_second:.2f} docs/s, {self.batches} batch(es), {self.retries} retries), "
+            f"{self.bytes_read / 1e6:.1f} MB read, "
+            f"peak payload {self.peak_payload_bytes / 1e6:.1f} MB, "
+            f"peak RSS growth {self.rss_peak_growth_bytes / 1e6:.1f} MB ({self.mode} mode)"
+            + self.stage_summary()
+        )
+
+    def stage_summary(self) -> str:
+        if not self.stage_seconds:
+            return ""
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stage_seconds.items())
+        return f"; stage time: {stages}"
+
+
+def _document_from_data_url(uploaded_file, metadata: dict) -> tuple:
+    content = data_url_from_file(uploaded_file)
+    return RAGDocument(document_id=uploaded_file.name, content=content, metadata=metadata), len(content)
+
+
+def _document_from_files_api(client: LlamaStackClient, uploaded_file, metadata: dict) -> tuple:
+    uploaded_file.seek(0)
+    # httpx streams file objects in multipart bodies, so the file is never copied here
+    file = client.files.create(file=(uploaded_file.name, uploaded_file, uploaded_file.type), purpose="assistants")
+    uri = FILES_CONTENT_URL.format(base_url=str(client.base_url).rstrip("/"), file_id=file.id)
+    document = RAGDocument(
+        document_id=uploaded_file.name,
+        content={"uri": uri},
+        mime_type=uploaded_file.type,
+        metadata=metadata,
+    )
+    return document, file.id
+
+
+def _spool_to_disk(uploaded_file) -> str:
+    """Copy an uploaded file to a temporary file in bounded reads; the caller deletes it."""
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    with tempfile.NamedTemporaryFile(prefix="ingest-", suffix=suffix, delete=False) as spool:
+        try:
+            for chunk in iter_file_chunks(uploaded_file):
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            os.unlink(spool.name)
+            raise
+    return spool.name
+
+
+@dataclass
+class ChunkingSettings:
+    """Per-collection chunking configuration for an upload."""
+
+    # Extract and chunk in the UI pod instead of on the llama-stack server
+    client_side: bool = CLIENT_CHUNKING
+    chunk_size_in_tokens: int = DEFAULT_CHUNK_SIZE_IN_TOKENS
+    # Only applied to client-side chunking; the server uses its own overlap
+    overlap_in_tokens: int = DEFAULT_CHUNK_OVERLAP_IN_TOKENS
+
+
+class _BatchInserter:
+    """Inserts one batch of files, with retries; shared state is guarded by a lock."""
+
+    def __init__(self, client, vector_db_id, chunking, stats, max_retries, backoff, content_hashes, inline_max_bytes=0):
+        self.client = client
+        self.inline_max_bytes = inline_max_bytes
+        self.content_hashes = content_hashes
+        self.vector_db_id = vector_db_id
+        self.chunking = chunking
+        self.stats = stats
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+
+    def _add_stage_time(self, stage: str, seconds: float):
+        with self._lock:
+            self.stats.stage_seconds[stage] = self.stats.stage_seconds.get(stage, 0.0) + seconds
+
+    def _metadata(self, uploaded_file) -> dict:
+        # LlamaStack maps 'source' to chunk_metadata.source
+        metadata = {"source": uploaded_file.name, "type": "uploaded_file"}
+        if uploaded_file.name in self.content_hashes:
+            metadata["content_hash"] = self.content_hashes[uploaded_file.name]
+        return metadata
+
+    def _insert_documents(self, batch: List):
+        """Server-side ingestion: llama-stack extracts, chunks and embeds."""
+        documents, file_ids, payload_bytes = [], [], 0
+        started = time.perf_counter()
+        try:
+            for uploaded_file in batch:
+                metadata = self._metadata(uploaded_file)
+                if self.stats.mode == "files" or 0 < self.inline_max_bytes < uploaded_file.size:
+                    document, file_id = _document_from_files_api(self.client, uploaded_file, metadata)
+                    file_ids.append(file_id)
+                else:
+                    document, size = _document_from_data_url(uploaded_file, metadata)
+                    payload_bytes += size
+                documents.append(document)
+            with self._lock:
+                self.stats.peak_payload_bytes = max(self.stats.peak_payload_bytes, payload_bytes)
+
+            self.client.tool_runtime.rag_tool.insert(
+                vector_db_id=self.vector_db_id,
+                documents=documents,
+                chunk_size_in_tokens=self.chunking.chunk_size_in_tokens,
+            )
+        finally:
+            for file_id in file_ids:
+                try:
+                    self.client.files.delete(file_id)
+                except Exception:
+                    pass
+            self._add_stage_time("server_ingest", time.perf_counter() - started)
+
+    def _prepare_chunks(self, batch: List) -> tuple:
+        """
+        Extract and chunk files on the process pool.
+
+        Each file is spooled to a temporary file in bounded reads and the
+        worker gets its path, so no copy of the content is pickled.
+
+        Returns:
+            tuple: ([(uploaded_file, chunks), ...], files_to_ingest_server_side)
+        """
+        futures, paths = [], []
+        try:
+            for uploaded_file in batch:
+                path = _spool_to_disk(uploaded_file)
+                paths.append(path)
+                futures.append((
+                    uploaded_file,
+                    get_chunking_executor().submit(
+                        extract_and_chunk,
+                        uploaded_file.name,
+                        path,
+                        self.chunking.chunk_size_in_tokens,
+                        self.chunking.overlap_in_tokens,
+                    ),
+                ))
+            results = []
+            for uploaded_file, future in futures:
+                try:
+                    results.append((uploaded_file, future.result()))
+                except Exception:
+                    results.append((uploaded_file, None))
+        finally:
+            for _, future in futures:
+                future.cancel()
+            for path in paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+        prepared, server_side = [], []
+        for uploaded_file, result in results:
+            if result is None:
+                # Unsupported type, missing extractor or unparsable file: let llama-stack try
+                server_side.append(uploaded_file)
+                continue
+            self._add_stage_time("extract", result["extract_seconds"])
+            self._add_stage_time("chunk", result["chunk_seconds"])
+            if result["chunks"]:
+                prepared.append((uploaded_file, result["chunks"]))
+            else:
+                server_side.append(uploaded_file)
+        return prepared, server_side
+
+    def _insert_chunks(self, prepared: List):
+        """Insert pre-chunked documents; llama-stack only computes embeddings."""
+        chunks = []
+        for uploaded_file, document_chunks in prepared:
+            metadata = {**self._metadata(uploaded_file), "document_id": uploaded_file.name}
+            for index, (text, token_count) in enumerate(document_chunks):
+                chunks.append({
+                    "content": text,
+                    "metadata": {**metadata, "chunk_index": index, "token_count": token_count},
+                    "chunk_metadata": {
+                        "chunk_id": f"{uploaded_file.name}:{index}",
+                        "document_id": uploaded_file.name,
+                        "source": uploaded_file.name,
+                        "content_token_count": token_count,
+                    },
+                })
+        started = time.perf_counter()
+        try:
+            self.client.vector_io.insert(vector_db_id=self.vector_db_id, chunks=chunks)
+        finally:
+            self._add_stage_time("embed_insert", time.perf_counter() - started)
+
+    def _with_retries(self, items: List, insert: Callable[[List], None], name_of: Callable) -> Dict[str, Optional[str]]:
+        """
+        Run insert(items), retrying transient errors with backoff.
+
+        Returns:
+            Dict[str, Optional[str]]: filename -> None on success or an error message
+        """
+        attempt = 0
+        while True:
+            try:
+                insert(items)
+                return {name_of(item): None for item in items}
+            except TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    error = e
+                    break
+                attempt += 1
+                with self._lock:
+                    self.stats.retries += 1
+                # Exponential backoff with jitter
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+            except Exception as e:
+                error = e
+                break
+
+        if not _may_have_stored(error):
+            if len(items) > 1:
+                # Isolate the failing document(s) by retrying each one on its own
+                results = {}
+                for item in items:
+                    results.update(self._with_retries([item], insert, name_of))
+                return results
+            return {name_of(items[0]): str(error)}
+
+        # Re-inserting these documents in other requests would store their
+        # chunks under new ids next to any that made it; leave them failed
+        names = [name_of(item) for item in items]
+        with self._lock:
+            self.stats.partial.extend(names)
+        return {name: str(error) for name in names}
+
+    def __call__(self, batch: List) -> Dict[str, Optional[str]]:
+        """
+        Insert a batch; returns {filename: None on success or an error message}.
+        """
+        results = {}
+        server_side = batch
+        if self.chunking.client_side:
+            prepared, server_side = self._prepare_chunks(batch)
+            if prepared:
+                results.update(self._with_retries(prepared, self._insert_chunks, lambda item: item[0].name))
+        if server_side:
+            results.update(self._with_retries(server_side, self._insert_documents, lambda item: item.name))
+        return results
+
+
+def ingest_documents(
+    client: LlamaStackClient,
+    vector_db_id: str,
+    uploaded_files: List,
+    chunking: Optional[ChunkingSettings] = None,
+    mode: Optional[str] = None,
+    batch_size: int = INGEST_BATCH_SIZE,
+    max_workers: int = INGEST_WORKERS,
+    max_retries: int = INGEST_MAX_RETRIES,
+    content_hashes: Optional[Dict[str, str]] = None,
+    on_progress: Optional[Callable[[int, int, Dict[str, Optional[str]]], None]] = None,
+    inline_max_bytes: int = INLINE_MAX_BYTES,
+) -> UploadStats:
+    """
+    Insert uploaded files into a vector database in concurrent batches.
+
+    Args:
+        client: LlamaStackClient to insert through
+        vector_db_id: Target vector database identifier
+        uploaded_files: Streamlit UploadedFile objects (or any file-like with name, size, type)
+        chunking: Chunk size/overlap and whether to chunk in the UI pod
+        mode: "inline" or "files" (RAG_UPLOAD_MODE by default)
+        batch_size: Documents per rag_tool.insert request
+        max_workers: Batches inserted concurrently
+        max_retries: Retries per batch for transient errors
+        content_hashes: filename -> content hash, stored in each document's metadata
+        on_progress: Called in the caller's thread after each batch with
+            (files_done, files_total, {filename: error or None})
+        inline_max_bytes: In inline mode, send larger files through the Files API (0 for no limit)
+
+    Returns:
+        UploadStats: Counters, throughput and memory accounting; per-file
+        failures are listed in ``errors``
+    """
+    stats = UploadStats(mode=mode or UPLOAD_MODE)
+    rss_before = max_rss_bytes()
+    started = time.perf_counter()
+
+    batch_size = max(1, batch_size)
+    batches = [uploaded_files[i:i + batch_size] for i in range(0, len(uploaded_files), batch_size)]
+    stats.batches = len(batches)
+    sizes = {uploaded_file.name: uploaded_file.size for uploaded_file in uploaded_files}
+    insert_batch = _BatchInserter(
+        client,
+        vector_db_id,
+        chunking or ChunkingSettings(),
+        stats,
+        max_retries,
+        INGEST_RETRY_BACKOFF,
+        content_hashes or {},
+        inline_max_bytes,
+    )
+
+    def traced_batch(batch):
+        with tracing.span("ingest.batch", vector_db_id=vector_db_id, documents=len(batch)):
+            return insert_batch(batch)
+
+    files_done = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ingest") as executor:
+        futures = [executor.submit(tracing.bind_context(traced_batch), batch) for batch in batches]
+        for future in as_completed(futures):
+            results = future.result()
+            for filename, error in results.items():
+                if error is None:
+                    stats.documents += 1
+                    stats.bytes_read += sizes.get(filename, 0)
+                else:
+                    stats.failed += 1
+                    stats.errors[filename] = error
+            files_done += len(results)
+            stats.elapsed_seconds = time.perf_counter() - started
+            if on_progress:
+                on_progress(files_done, len(uploaded_files), results)
+
+    stats.elapsed_seconds = time.perf_counter() - started
+    stats.rss_peak_growth_bytes = max(0, max_rss_bytes() - rss_before)
+
+    metrics.UPLOAD_DOCUMENTS.labels(vector_db_id, "ingested").inc(stats.documents)
+    metrics.UPLOAD_DOCUMENTS.labels(vector_db_id, "failed").inc(stats.failed)
+    metrics.UPLOAD_BYTES.labels(vector_db_id).inc(stats.bytes_read)
+    if stats.documents:
+        metrics.UPLOAD_DOCS_PER_SECOND.labels(vector_db_id).observe(stats.docs_per_second)
+    return stats
+
+
+@dataclass
+class UploadPlan:
+    """Which uploaded files need embedding, based on content hashes already stored."""
+
+    # Files to insert (new documents and changed versions of existing ones)
+    to_ingest: List = field(default_factory=list)
+    # filename -> content hash for existing documents whose content changed
+    replaced: Dict[str, str] = field(default_factory=dict)
+    # filename -> reason for files that need no embedding
+    skipped: Dict[str, str] = field(default_factory=dict)
+
+
+def plan_uploads(uploaded_files: List, content_hashes: Dict[str, str], existing: List[tuple]) -> UploadPlan:
+    """
+    Classify uploaded files against documents already in the vector database.
+
+    Args:
+        uploaded_files: Files selected for upload
+        content_hashes: filename -> content hash of each uploaded file
+        existing: (filename, content_hash) pairs already stored, e.g. from
+            PgVectorStore.find_documents
+
+    Returns:
+        UploadPlan: Unchanged files and byte-identical copies of stored
+        documents are skipped; files whose name exists with other content are
+        re-ingested and marked as replacements.
+    """
+    stored_hash_by_source = dict(existing)
+    source_by_hash = {content_hash: source for source, content_hash in existing if content_hash}
+    plan = UploadPlan()
+    seen_hashes = {}
+
+    for uploaded_file in uploaded_files:
+        name, content_hash = uploaded_file.name, content_hashes[uploaded_file.name]
+        if stored_hash_by_source.get(name) == content_hash:
+            plan.skipped[name] = "unchanged"
+        elif content_hash in source_by_hash and source_by_hash[content_hash] != name:
+            plan.skipped[name] = f"identical to '{source_by_hash[content_hash]}'"
+        elif content_hash in seen_hashes:
+            plan.skipped[name] = f"identical to '{seen_hashes[content_hash]}'"
+        else:
+            plan.to_ingest.append(uploaded_file)
+            seen_hashes[content_hash] = name
+            if name in stored_hash_by_source:
+                plan.replaced[name] = content_hash
+    return plan
+
+
+def plan_collection_uploads(store, vector_db_id: str, uploaded_files: List, content_hashes: Dict[str, str]) -> UploadPlan:
+    """
+    Plan an upload against the documents already stored in vector_db_id.
+
+    Args:
+        store: PgVectorStore holding the document catalog
+        vector_db_id: Target vector database identifier
+        uploaded_files: Files selected for upload
+        content_hashes: filename -> content hash of each uploaded file
+    """
+    try:
+        existing = store.find_documents(vector_db_id, list(content_hashes), list(content_hashes.values()))
+    except Exception:
+        existing = []  # No catalog available; ingest everything
+    return plan_uploads(uploaded_files, content_hashes, existing)
+
+
+def store_planned_uploads(
+    client: LlamaStackClient,
+    store,
+    vector_db_id: str,
+    plan: UploadPlan,
+    content_hashes: Dict[str, str],
+    chunking: Optional[ChunkingSettings] = None,
+    on_progress: Optional[Callable[[int, int, Dict[str, Optional[str]]], None]] = None,
+    mode: Optional[str] = None,
+) -> UploadStats:
+    """
+    Ingest the files of an upload plan and bring the document catalog up to date.
+
+    New chunks of changed documents are stored before the old version is
+    pruned, so a document is never missing; files whose old chunks could not
+    be removed are reported in the returned stats' errors. Chunks a failed
+    insert may have stored for the new version are removed again, so a
+    later upload of the same file starts clean.
+
+    Returns:
+        UploadStats: Ingestion statistics and per-file errors
+    """
+    stats = ingest_documents(
+        client,
+        vector_db_id,
+        plan.to_ingest,
+        chunking=chunking,
+        mode=mode,
+        content_hashes=content_hashes,
+        on_progress=on_progress,
+    )
+    stored = [uploaded_file.name for uploaded_file in plan.to_ingest if uploaded_file.name not in stats.errors]
+
+    if stats.partial:
+        try:
+            store.discard_document_versions(vector_db_id, {filename: content_hashes[filename] for filename in stats.partial})
+        except Exception as e:
+            stats.errors.update({
+                filename: f"{stats.errors[filename]}; partly stored chunks not removed: {e}" for filename in stats.partial
+            })
+
+    # Swap in the new versions of changed documents: their new chunks are
+    # already stored, so drop the old ones in a single transaction
+    replaced = {filename: content_hash for filename, content_hash in plan.replaced.items() if filename in stored}
+    if replaced:
+        try:
+            store.prune_document_versions(vector_db_id, replaced)
+        except Exception as e:
+            stats.errors.update({filename: f"new version stored but old chunks not removed: {e}" for filename in replaced})
+    if stored:
+        try:
+            store.refresh_documents(vector_db_id, stored)
+        except Exception:
+            pass  # The chunk table may not exist yet; the catalog is built on first listing
+    return stats
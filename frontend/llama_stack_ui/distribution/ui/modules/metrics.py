@@ -0,0 +1,117 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import os
+import threading
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+
+"""
+Prometheus metrics for the UI pod.
+
+Metrics live in the default registry of the process and are served by an
+embedded exporter on METRICS_PORT (0 disables it), separate from the
+Streamlit port.
+"""
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9090"))
+
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Labelled by how many collections one query searched, not by which: the
+# selected combinations are unbounded, the count is capped
+RAG_QUERY_SECONDS = Histogram(
+    "llamastack_ui_rag_query_seconds",
+    "Latency of rag_tool.query calls to llama-stack (cache misses only)",
+    ["collections"],
+    buckets=_LATENCY_BUCKETS,
+)
+_MAX_COLLECTIONS_LABEL = 5
+RAG_CACHE_LOOKUPS = Counter(
+    "llamastack_ui_rag_cache_lookups_total",
+    "RAG result cache lookups",
+    ["result"],
+)
+TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "llamastack_ui_time_to_first_token_seconds",
+    "Time from the chat completion request to the first streamed token",
+    ["model"],
+    buckets=_LATENCY_BUCKETS,
+)
+COMPLETION_SECONDS = Histogram(
+    "llamastack_ui_completion_seconds",
+    "Duration of streamed chat completions",
+    ["model"],
+    buckets=_LATENCY_BUCKETS,
+)
+COMPLETION_TOKENS = Counter(
+    "llamastack_ui_completion_tokens_total",
+    "Completion tokens generated",
+    ["model"],
+)
+CATALOG_LOOKUPS = Counter(
+    "llamastack_ui_catalog_lookups_total",
+    "Catalog listings requested (models, toolgroups, tools, vector_dbs, providers)",
+    ["resource"],
+)
+CATALOG_BACKEND_CALLS = Counter(
+    "llamastack_ui_catalog_backend_calls_total",
+    "Catalog listings fetched from llama-stack (cache misses and refreshes)",
+    ["resource"],
+)
+PGVECTOR_QUERY_SECONDS = Histogram(
+    "llamastack_ui_pgvector_query_seconds",
+    "Time spent running pgvector operations on a pooled connection",
+    ["operation"],
+    buckets=_QUERY_BUCKETS,
+)
+UPLOAD_DOCUMENTS = Counter(
+    "llamastack_ui_upload_documents_total",
+    "Documents ingested through the UI",
+    ["collection", "status"],
+)
+UPLOAD_BYTES = Counter(
+    "llamastack_ui_upload_bytes_total",
+    "Bytes of uploaded documents read for ingestion",
+    ["collection"],
+)
+UPLOAD_DOCS_PER_SECOND = Histogram(
+    "llamastack_ui_upload_docs_per_second",
+    "Ingestion throughput of each upload",
+    ["collection"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100),
+)
+
+
+def collections_label(count: int) -> str:
+    """RAG_QUERY_SECONDS label for a query over count collections ("1" ... "5+")."""
+    return str(count) if count < _MAX_COLLECTIONS_LABEL else f"{_MAX_COLLECTIONS_LABEL}+"
+
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> bool:
+    """
+    Start the exporter once per process.
+
+    Returns:
+        bool: True if the exporter is running on port
+    """
+    global _server_started
+    with _server_lock:
+        if _server_started or port <= 0:
+            return _server_started
+        try:
+            start_http_server(port)
+        except OSError:
+            # Port already bound, e.g. by a previous instance in the same pod
+            return False
+        _server_started = True
+        return True
@@ -0,0 +1,602 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import asyncio
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import asyncpg
+
+from llama_stack_ui.distribution.ui.modules import metrics, tracing
+
+
+"""
+Direct pgvector access for the UI pages.
+
+A single asyncpg pool lives on a dedicated event-loop thread for the whole
+process. Streamlit script threads call the synchronous methods of
+PgVectorStore, which submit coroutines to that loop and wait for the result.
+Queries go through asyncpg's per-connection statement cache, so each
+statement is prepared once per pooled connection and reused afterwards.
+
+Document listings are served from a sidecar catalog table holding one row
+per (vector database, document) with its chunk count. The catalog is built
+on demand from the chunk table and is kept current by the upload and delete
+paths. It records the OID of the chunk table it was built from, so a
+collection that is dropped and registered again gets a fresh catalog. The
+expression index on the document source is built in the background.
+"""
+
+
+def table_name(vector_db_id: str) -> str:
+    """Table LlamaStack's pgvector provider uses for a vector database."""
+    return f"vs_{vector_db_id.replace('-', '_')}"
+
+
+# Filename of a chunk, falling back to the auto-generated document_id
+SOURCE_EXPRESSION = (
+    "COALESCE(NULLIF(document->'chunk_metadata'->>'source', 'null'), "
+    "document->'metadata'->>'document_id')"
+)
+
+# Content hash the UI stores in each chunk's document metadata at upload time
+CONTENT_HASH_EXPRESSION = "document->'metadata'->>'content_hash'"
+
+CATALOG_TABLE = "ui_document_catalog"
+CATALOG_COLLECTIONS_TABLE = "ui_document_catalog_collections"
+
+CATALOG_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+        vector_db_id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        chunk_count INTEGER NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (vector_db_id, source)
+    );
+    ALTER TABLE {CATALOG_TABLE} ADD COLUMN IF NOT EXISTS content_hash TEXT;
+    CREATE INDEX IF NOT EXISTS {CATALOG_TABLE}_hash_idx ON {CATALOG_TABLE} (vector_db_id, content_hash);
+    CREATE TABLE IF NOT EXISTS {CATALOG_COLLECTIONS_TABLE} (
+        vector_db_id TEXT PRIMARY KEY,
+        built_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    ALTER TABLE {CATALOG_COLLECTIONS_TABLE} ADD COLUMN IF NOT EXISTS table_oid OID;
+"""
+
+
+class PgVectorStore:
+    """
+    Long-lived asyncpg pool with a synchronous facade.
+
+    The pool and the loop thread are created lazily on first use and torn
+    down by close(), which is registered with atexit for the shared instance.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        database: str,
+        min_size: int = 1,
+        max_size: int = 5,
+        statement_cache_size: int = 100,
+        command_timeout: float = 30.0,
+    ):
+        self._connect_kwargs = {
+            "host": host,
+            "port": port,
+            "user": user,
+            "password": password,
+            "database": database,
+            "min_size": min_size,
+            "max_size": max(min_size, max_size),
+            "statement_cache_size": statement_cache_size,
+            "command_timeout": command_timeout,
+        }
+        self.command_timeout = command_timeout
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+        # Catalog setup already done by this process; only touched on the loop thread
+        self._catalog_schema_ready = False
+        # vector_db_id -> OID of the chunk table its catalog was built from
+        self._catalog_ready: Dict[str, int] = {}
+        # chunk table -> background source index build
+        self._index_builds: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls) -> "PgVectorStore":
+        """Build a store from the PGVECTOR_* environment variables."""
+        return cls(
+            host=os.environ.get("PGVECTOR_HOST", "pgvector"),
+            port=int(os.environ.get("PGVECTOR_PORT", "5432")),
+            user=os.environ.get("PGVECTOR_USER", "postgres"),
+            password=os.environ.get("PGVECTOR_PASSWORD", "rag_password"),
+            database=os.environ.get("PGVECTOR_DB", "rag_blueprint"),
+            min_size=int(os.environ.get("PGVECTOR_POOL_MIN_SIZE", "1")),
+            max_size=int(os.environ.get("PGVECTOR_POOL_MAX_SIZE", "5")),
+            statement_cache_size=int(os.environ.get("PGVECTOR_STATEMENT_CACHE_SIZE", "100")),
+            command_timeout=float(os.environ.get("PGVECTOR_COMMAND_TIMEOUT", "30")),
+        )
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="pgvector-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+                self._pool, self._pool_lock = None, None
+            return self._loop
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        # Runs on the loop thread, so the asyncio.Lock is bound to the right loop
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(**self._connect_kwargs)
+            return self._pool
+
+    def run(self, fn: Callable[[asyncpg.Connection], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(connection) on the loop thread with a pooled connection.
+
+        Args:
+            fn: Coroutine function receiving an asyncpg connection
+            timeout: Seconds to wait for the result (command_timeout by default)
+
+        Returns:
+            Whatever fn returns; exceptions raised by fn propagate to the caller.
+        """
+        return self.submit(fn).result(timeout=timeout or self.command_timeout)
+
+    def submit(self, fn: Callable[[asyncpg.Connection], Awaitable[Any]]) -> Future:
+        """Schedule fn(connection) on the loop thread without waiting for it."""
+        # Label query timings with the public method that defined fn
+        operation = fn.__qualname__.split(".<locals>")[0].rsplit(".", 1)[-1]
+        # The loop thread has its own context; parent the span explicitly
+        parent = tracing.current_context()
+
+        async def with_connection():
+            with tracing.span(f"pgvector.{operation}", parent=parent, **{"db.system": "postgresql"}):
+                pool = await self._get_pool()
+                async with pool.acquire() as conn:
+                    started = time.perf_counter()
+                    try:
+                        return await fn(conn)
+                    finally:
+                        metrics.PGVECTOR_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(with_connection(), loop)
+
+    def _catalog_timeout(self, vector_db_id: str) -> float:
+        """Seconds to wait for a call that may first have to backfill the catalog."""
+        if vector_db_id in self._catalog_ready:
+            return self.command_timeout
+        return self.command_timeout * 10
+
+    async def _ensure_catalog(self, conn: asyncpg.Connection, vector_db_id: str, rebuild: bool = False):
+        """
+        Make sure the catalog for vector_db_id exists, building it if needed.
+
+        Creates the catalog tables, then backfills the catalog from the chunk
+        table unless it was already built from that same table (by this or
+        another pod). A catalog left over from an earlier table with the same
+        name is discarded; with no chunk table yet the catalog is just empty.
+        The source expression index is built in the background. Callers
+        waiting on this should allow _catalog_timeout() for the backfill.
+        """
+        if not self._catalog_schema_ready:
+            await conn.execute(CATALOG_SCHEMA)
+            self._catalog_schema_ready = True
+        table = table_name(vector_db_id)
+        table_oid = await conn.fetchval("SELECT to_regclass($1)::oid", table)
+        if table_oid is not None and self._catalog_ready.get(vector_db_id) == table_oid and not rebuild:
+            return
+
+        if table_oid is not None:
+            self._schedule_source_index(table)
+        async with conn.transaction():
+            # Serialize builds of the same collection across pods
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", vector_db_id)
+            built_oid = await conn.fetchval(
+                f"SELECT table_oid FROM {CATALOG_COLLECTIONS_TABLE} WHERE vector_db_id = $1", vector_db_id
+            )
+            if table_oid is None:
+                await self._clear_catalog(conn, vector_db_id)
+            elif rebuild or built_oid != table_oid:
+                await conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE vector_db_id = $1", vector_db_id)
+                await conn.execute(
+                    f"""
+                    INSERT INTO {CATALOG_TABLE} (vector_db_id, source, chunk_count, content_hash)
+                    SELECT $1, source, count(*), max(content_hash)
+                    FROM (
+                        SELECT {SOURCE_EXPRESSION} AS source, {CONTENT_HASH_EXPRESSION} AS content_hash
+                        FROM {table}
+                    ) chunks
+                    WHERE source IS NOT NULL
+                    GROUP BY source
+                    """,
+                    vector_db_id,
+                    timeout=self.command_timeout * 10,
+                )
+                await conn.execute(
+                    f"""
+                    INSERT INTO {CATALOG_COLLECTIONS_TABLE} (vector_db_id, table_oid) VALUES ($1, $2)
+                    ON CONFLICT (vector_db_id) DO UPDATE SET built_at = now(), table_oid = EXCLUDED.table_oid
+                    """,
+                    vector_db_id,
+                    table_oid,
+                )
+        if table_oid is None:
+            self._catalog_ready.pop(vector_db_id, None)
+        else:
+            self._catalog_ready[vector_db_id] = table_oid
+
+    async def _clear_catalog(self, conn: asyncpg.Connection, vector_db_id: str):
+        await conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE vector_db_id = $1", vector_db_id)
+        await conn.execute(f"DELETE FROM {CATALOG_COLLECTIONS_TABLE} WHERE vector_db_id = $1", vector_db_id)
+
+    def _schedule_source_index(self, table: str):
+        """Start a background source index build for table unless one is running or done. Loop thread only."""
+        if self._build_state(self._index_builds.get(table)) in ("building", "ready"):
+            return
+
+        async def build():
+            pool = await self._get_pool()
+            async with pool.acquire() as conn:
+                return await self._ensure_source_index(conn, table)
+
+        task = asyncio.get_running_loop().create_task(build())
+        # Mark a failed build's exception as retrieved; the next listing retries it
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._index_builds[table] = task
+
+    async def _ensure_source_index(self, conn: asyncpg.Connection, table: str) -> bool:
+        """
+        Build the source expression index on a chunk table without blocking llama-stack inserts.
+
+        CREATE INDEX CONCURRENTLY cannot run inside a transaction, so this must
+        be called outside one. A session advisory lock keeps pods from building
+        at the same time; a pod that finds a build in progress goes on without
+        the index, which only makes its catalog queries slower.
+
+        Returns:
+            bool: True if the index is in place, False if another session is building it
+        """
+        index = f"{table}_source_idx"
+        if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", index):
+            return False
+        try:
+            valid = await conn.fetchval(
+                "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = $1",
+                index,
+            )
+            if valid:
+                return True
+            if valid is False:
+                # Left behind by an interrupted concurrent build
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+            await conn.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} (({SOURCE_EXPRESSION}))",
+                timeout=self.command_timeout * 10,
+            )
+            return True
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", index)
+
+    def source_index_state(self, vector_db_id: str) -> str:
+        """
+        State of this process's source index build for a vector database.
+
+        Returns:
+            str: "building" while the background build runs, "ready" once the
+            index is in place, "pending" otherwise (not started, or to be
+            retried on the next listing)
+        """
+        return self._build_state(self._index_builds.get(table_name(vector_db_id)))
+
+    @staticmethod
+    def _build_state(task: Optional[asyncio.Task]) -> str:
+        if task is None:
+            return "pending"
+        if not task.done():
+            return "building"
+        if not task.cancelled() and not task.exception() and task.result():
+            return "ready"
+        return "pending"
+
+    def ensure_catalog(self, vector_db_id: str, rebuild: bool = False):
+        """Create (or with rebuild=True, recompute) the document catalog of a vector database."""
+        async def ensure(conn):
+            await self._ensure_catalog(conn, vector_db_id, rebuild=rebuild)
+
+        return self.run(ensure, timeout=self.command_timeout * 10)
+
+    def forget_catalog(self, vector_db_id: str):
+        """
+        Drop the document catalog of a vector database.
+
+        Call this when the collection is registered or deleted: the catalog is
+        rebuilt from the chunk table on the next listing.
+        """
+        async def forget(conn):
+            self._catalog_ready.pop(vector_db_id, None)
+            if not self._catalog_schema_ready:
+                await conn.execute(CATALOG_SCHEMA)
+                self._catalog_schema_ready = True
+            async with conn.transaction():
+                await self._clear_catalog(conn, vector_db_id)
+
+        return self.run(forget)
+
+    def list_documents(self, vector_db_id: str) -> List[str]:
+        """Document filenames stored in a vector database, sorted, read from the catalog."""
+        async def fetch(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            rows = await conn.fetch(
+                f"SELECT source FROM {CATALOG_TABLE} WHERE vector_db_id = $1 ORDER BY source",
+                vector_db_id,
+            )
+            return [row["source"] for row in rows]
+
+        return self.run(fetch, timeout=self._catalog_timeout(vector_db_id))
+
+    def list_documents_page(
+        self,
+        vector_db_id: str,
+        after: Optional[str] = None,
+        limit: int = 50,
+        search: Optional[str] = None,
+    ) -> Tuple[List[Tuple[str, int]], bool, int]:
+        """
+        One page of the document catalog, using keyset pagination on the filename.
+
+        Args:
+            vector_db_id: The vector database identifier
+            after: Return documents whose filename sorts after this one (None for the first page)
+            limit: Page size
+            search: Case-insensitive substring filter on the filename
+
+        Returns:
+            Tuple[List[Tuple[str, int]], bool, int]:
+            ([(filename, chunk_count), ...], has_more, total_matching)
+        """
+        pattern = None
+        if search:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+        filters = """
+            vector_db_id = $1
+            AND ($2::text IS NULL OR source ILIKE $2)
+        """
+
+        async def fetch(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            rows = await conn.fetch(
+                f"""
+                SELECT source, chunk_count FROM {CATALOG_TABLE}
+                WHERE {filters} AND ($3::text IS NULL OR source > $3)
+                ORDER BY source
+                LIMIT $4
+                """,
+                vector_db_id,
+                pattern,
+                after,
+                limit + 1,
+            )
+            total = await conn.fetchval(f"SELECT count(*) FROM {CATALOG_TABLE} WHERE {filters}", vector_db_id, pattern)
+            page = [(row["source"], row["chunk_count"]) for row in rows[:limit]]
+            return page, len(rows) > limit, total
+
+        return self.run(fetch, timeout=self._catalog_timeout(vector_db_id))
+
+    def refresh_documents(self, vector_db_id: str, sources: List[str]):
+        """
+        Recount the chunks of the given documents and update their catalog rows.
+
+        Called after uploads; documents left with no chunks are removed.
+        """
+        async def refresh(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            async with conn.transaction():
+                await self._refresh_catalog_rows(conn, vector_db_id, sources)
+
+        return self.run(refresh, timeout=self._catalog_timeout(vector_db_id))
+
+    async def _refresh_catalog_rows(self, conn: asyncpg.Connection, vector_db_id: str, sources: List[str]):
+        await conn.execute(
+            f"DELETE FROM {CATALOG_TABLE} WHERE vector_db_id = $1 AND source = ANY($2::text[])",
+            vector_db_id,
+            list(sources),
+        )
+        await conn.execute(
+            f"""
+            INSERT INTO {CATALOG_TABLE} (vector_db_id, source, chunk_count, content_hash)
+            SELECT $1, {SOURCE_EXPRESSION} AS source, count(*), max({CONTENT_HASH_EXPRESSION})
+            FROM {table_name(vector_db_id)}
+            WHERE {SOURCE_EXPRESSION} = ANY($2::text[])
+            GROUP BY source
+            """,
+            vector_db_id,
+            list(sources),
+        )
+
+    def find_documents(
+        self, vector_db_id: str, sources: List[str], content_hashes: List[str]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Catalog entries matching any of the filenames or content hashes.
+
+        Returns:
+            List[Tuple[str, Optional[str]]]: (filename, content_hash) pairs; the
+            hash is None for documents uploaded before hashing was introduced
+        """
+        async def fetch(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            rows = await conn.fetch(
+                f"""
+                SELECT source, content_hash FROM {CATALOG_TABLE}
+                WHERE vector_db_id = $1
+                AND (source = ANY($2::text[]) OR content_hash = ANY($3::text[]))
+                """,
+                vector_db_id,
+                list(sources),
+                list(content_hashes),
+            )
+            return [(row["source"], row["content_hash"]) for row in rows]
+
+        return self.run(fetch, timeout=self._catalog_timeout(vector_db_id))
+
+    def prune_document_versions(self, vector_db_id: str, current_hashes: Dict[str, str]) -> int:
+        """
+        Drop chunks of older versions of re-uploaded documents.
+
+        After a changed file has been inserted with its new content hash, this
+        removes every chunk of that filename carrying a different (or no) hash
+        and refreshes the catalog rows, all in one transaction.
+
+        Args:
+            current_hashes: filename -> content hash of the version to keep
+
+        Returns:
+            int: Number of stale chunks removed
+        """
+        sources, hashes = list(current_hashes), list(current_hashes.values())
+
+        async def prune(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            async with conn.transaction():
+                result = await conn.execute(
+                    f"""
+                    DELETE FROM {table_name(vector_db_id)} AS chunks
+                    USING unnest($1::text[], $2::text[]) AS latest(source, content_hash)
+                    WHERE {SOURCE_EXPRESSION} = latest.source
+                    AND COALESCE({CONTENT_HASH_EXPRESSION}, '') <> latest.content_hash
+                    """,
+                    sources,
+                    hashes,
+                )
+                await self._refresh_catalog_rows(conn, vector_db_id, sources)
+            return int(result.split()[-1]) if result else 0
+
+        return self.run(prune, timeout=self._catalog_timeout(vector_db_id))
+
+    def discard_document_versions(self, vector_db_id: str, hashes: Dict[str, str]) -> int:
+        """
+        Drop the chunks of specific document versions, e.g. left by a failed insert.
+
+        The inverse of prune_document_versions: removes every chunk of each
+        filename carrying exactly the given hash and refreshes the catalog
+        rows, all in one transaction.
+
+        Args:
+            hashes: filename -> content hash of the version to drop
+
+        Returns:
+            int: Number of chunks removed
+        """
+        sources, content_hashes = list(hashes), list(hashes.values())
+
+        async def discard(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            async with conn.transaction():
+                result = await conn.execute(
+                    f"""
+                    DELETE FROM {table_name(vector_db_id)} AS chunks
+                    USING unnest($1::text[], $2::text[]) AS version(source, content_hash)
+                    WHERE {SOURCE_EXPRESSION} = version.source
+                    AND {CONTENT_HASH_EXPRESSION} = version.content_hash
+                    """,
+                    sources,
+                    content_hashes,
+                )
+                await self._refresh_catalog_rows(conn, vector_db_id, sources)
+            return int(result.split()[-1]) if result else 0
+
+        return self.run(discard, timeout=self._catalog_timeout(vector_db_id))
+
+    def delete_documents(
+        self, vector_db_id: str, sources: List[str], wait: bool = True
+    ) -> Union[Dict[str, int], Future]:
+        """
+        Delete several documents and their catalog rows in one transaction.
+
+        Args:
+            vector_db_id: The vector database identifier
+            sources: Filenames to delete
+            wait: Block until the delete is done; with False it runs in the background
+
+        Returns:
+            Union[Dict[str, int], Future]: Chunks removed per requested filename
+            (0 when none matched), or with wait=False a concurrent.futures.Future
+            resolving to those counts
+        """
+        sources = list(dict.fromkeys(sources))
+        # Large deletes can outlast the default command timeout
+        timeout = self.command_timeout * 10
+
+        async def delete(conn):
+            await self._ensure_catalog(conn, vector_db_id)
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    f"""
+                    WITH deleted AS (
+                        DELETE FROM {table_name(vector_db_id)}
+                        WHERE {SOURCE_EXPRESSION} = ANY($1::text[])
+                        RETURNING {SOURCE_EXPRESSION} AS source
+                    )
+                    SELECT source, count(*) AS chunk_count FROM deleted GROUP BY source
+                    """,
+                    sources,
+                    timeout=timeout,
+                )
+                await conn.execute(
+                    f"DELETE FROM {CATALOG_TABLE} WHERE vector_db_id = $1 AND source = ANY($2::text[])",
+                    vector_db_id,
+                    sources,
+                )
+            counts = {source: 0 for source in sources}
+            counts.update({row["source"]: row["chunk_count"] for row in rows})
+            return counts
+
+        if not wait:
+            return self.submit(delete)
+        return self.run(delete, timeout=timeout)
+
+    def delete_document(self, vector_db_id: str, source: str) -> int:
+        """Delete every chunk of a document; returns the number of chunks removed."""
+        return self.delete_documents(vector_db_id, [source])[source]
+
+    def close(self):
+        """Close the pool and stop the loop thread."""
+        with self._lock:
+            loop, thread, pool = self._loop, self._thread, self._pool
+            self._loop, self._thread, self._pool, self._pool_lock = None, None, None, None
+        if loop is None:
+            return
+        if pool is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(pool.close(), loop).result(timeout=5)
+            except Exception:
+                pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+
+
+pgvector_store = PgVectorStore.from_env()
+atexit.register(pgvector_store.close)
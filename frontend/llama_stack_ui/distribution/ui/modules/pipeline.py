@@ -0,0 +1,314 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from llama_stack.apis.common.content_types import ToolCallDelta
+
+from llama_stack_ui.distribution.ui.modules import metrics, tracing
+from llama_stack_ui.distribution.ui.modules.api import LlamaStackApi
+from llama_stack_ui.distribution.ui.modules.context import (
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_SYSTEM_PROMPT,
+    RAG_COLLECTION_TOP_K,
+    RAG_PROMPT_TEMPLATE,
+    PackedContext,
+    build_direct_messages,
+    chunks_from_rag_result,
+    context_budget,
+    merge_collection_results,
+    pack_context,
+)
+from llama_stack_ui.distribution.ui.modules.streaming import StreamRenderer
+
+
+"""
+Direct-mode chat pipeline: retrieval, context packing and streamed inference.
+
+The chat page renders each stage with Streamlit; the functions here hold no UI
+code so the same pipeline can be driven headlessly (benchmarks, batch
+evaluation). Everything a turn records goes to the debug_events list it is
+given, in the shape the chat page's debug expander displays.
+"""
+
+
+# Sampling defaults of the chat page; the suggestion warmer precomputes
+# answers for them, which the chat only reuses at temperature 0
+DEFAULT_TEMPERATURE = float(os.environ.get("CHAT_DEFAULT_TEMPERATURE", "0.1"))
+DEFAULT_TOP_P = 0.95
+DEFAULT_MAX_TOKENS = 512
+DEFAULT_REPETITION_PENALTY = 1.0
+
+
+def get_strategy(temperature, top_p):
+    """Determines the sampling strategy for the LLM based on temperature."""
+    return {'type': 'greedy'} if temperature == 0 else {
+            'type': 'top_p', 'temperature': temperature, 'top_p': top_p
+        }
+
+
+def replay_completion(text: str) -> Iterator[str]:
+    """Yield a cached response in word-sized pieces, like a streamed completion."""
+    yield from re.findall(r"\s*\S+|\s+", text)
+
+
+@dataclass
+class TurnSettings:
+    """Sidebar settings that shape a direct-mode turn."""
+
+    model: str
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+    temperature: float = DEFAULT_TEMPERATURE
+    top_p: float = DEFAULT_TOP_P
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    repetition_penalty: float = DEFAULT_REPETITION_PENALTY
+    parallel_retrieval: bool = False
+    use_completion_cache: bool = False
+    context_window: int = DEFAULT_CONTEXT_WINDOW
+
+    def sampling_params(self) -> dict:
+        return {
+            "strategy": get_strategy(self.temperature, self.top_p),
+            "max_tokens": self.max_tokens,
+            "repetition_penalty": self.repetition_penalty,
+        }
+
+
+@dataclass
+class RetrievalResult:
+    context: Optional[PackedContext] = None
+    retrieval_seconds: Optional[float] = None
+    packing_seconds: Optional[float] = None
+    # vector_db_id -> reason, for collections dropped in parallel retrieval
+    skipped: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> Optional[str]:
+        return self.context.text if self.context else None
+
+
+@dataclass
+class GenerationResult:
+    response: str = ""
+    served_from_cache: bool = False
+    usage: Dict[str, float] = field(default_factory=dict)
+    stream_stats: dict = field(default_factory=dict)
+
+
+def retrieve_context(
+    api: LlamaStackApi,
+    client,
+    prompt: str,
+    vector_db_ids: List[str],
+    settings: TurnSettings,
+    debug_events: List,
+    vector_db_names: Optional[List[str]] = None,
+) -> RetrievalResult:
+    """
+    Retrieve and pack RAG context for prompt.
+
+    Failures are recorded in the result and in debug_events rather than raised,
+    so the turn can continue without context.
+    """
+    result = RetrievalResult()
+    parallel = settings.parallel_retrieval and len(vector_db_ids) > 1
+    with tracing.span("rag.retrieve", vector_db_ids=vector_db_ids, parallel=parallel):
+        retrieval_started = time.perf_counter()
+        try:
+            if parallel:
+                # One query per collection; the merge keeps a quota of
+                # the best chunks from each collection that answered
+                results_by_db, result.skipped, cache_hits = api.query_rag_per_collection(prompt, vector_db_ids, client)
+                debug_events.append({
+                    "type": "rag_parallel_retrieval",
+                    "answered": list(results_by_db),
+                    "failed": result.skipped,
+                    "cache_hits": cache_hits,
+                })
+                if not results_by_db:
+                    raise RuntimeError("no collection returned results")
+                retrieved_chunks = merge_collection_results(results_by_db, RAG_COLLECTION_TOP_K)
+                # A hit only when no collection had to go to llama-stack
+                cache_hit = not result.skipped and all(cache_hits.values())
+            else:
+                # Repeated questions against the same collections are
+                # served from the shared cache
+                rag_response, cache_hit = api.query_rag(prompt, vector_db_ids, client)
+                retrieved_chunks = chunks_from_rag_result(rag_response)
+            result.retrieval_seconds = time.perf_counter() - retrieval_started
+            # Rank, deduplicate and trim the chunks to what fits next to
+            # the prompt and the completion in the model's context window
+            budget = context_budget(
+                settings.context_window, settings.max_tokens, settings.system_prompt + RAG_PROMPT_TEMPLATE + prompt
+            )
+            result.context = pack_context(retrieved_chunks, budget)
+            result.packing_seconds = time.perf_counter() - retrieval_started - result.retrieval_seconds
+            prompt_context = result.context.text
+            debug_events.append({
+                "type": "rag_query_direct_mode", "query": prompt,
+                "vector_dbs": vector_db_names or vector_db_ids,
+                "cache": "hit" if cache_hit else "miss",
+                "cache_hit_rate": round(api.rag_cache_stats()["hit_rate"], 3),
+                "context_length": len(prompt_context) if prompt_context else 0,
+                "context_preview": (str(prompt_context[:200]) + "..." if prompt_context else "None")
+            })
+            debug_events.append(result.context.debug_event())
+        except Exception as e:
+            result.retrieval_seconds = time.perf_counter() - retrieval_started
+            result.error = str(e)
+            debug_events.append({"type": "error", "source": "rag_direct_mode", "content": str(e)})
+    return result
+
+
+def generate_answer(
+    api: LlamaStackApi,
+    inference_client,
+    prompt: str,
+    context: Optional[str],
+    settings: TurnSettings,
+    renderer: StreamRenderer,
+    debug_events: List,
+) -> GenerationResult:
+    """
+    Stream the answer to prompt through renderer, or replay it from the completion cache.
+    """
+    result = GenerationResult()
+    endpoint = str(getattr(inference_client, "base_url", ""))
+    with tracing.span("inference.chat_completion", model=settings.model, endpoint=endpoint) as inference_span:
+        retrieval_response = ""
+
+        # Construct the extended prompt and run inference directly using
+        # the configured client (XC URL or default)
+        messages = build_direct_messages(settings.system_prompt, prompt, context)
+        sampling_params = settings.sampling_params()
+        cache_key = None
+        if settings.use_completion_cache:
+            cache_key = api.completion_cache_key(settings.model, messages, sampling_params, inference_client)
+        cached_response = api.get_cached_completion(cache_key)
+        result.served_from_cache = cached_response is not None
+        if cached_response is not None:
+            debug_events.append({"type": "completion_cache", "cache": "hit", "model": settings.model})
+            # Replay through the same streaming display
+            for response_text in replay_completion(cached_response):
+                renderer.write(response_text)
+        else:
+            response = inference_client.inference.chat_completion(
+                messages=messages,
+                model_id=settings.model,
+                sampling_params=sampling_params,
+                stream=True,
+                timeout=120,
+            )
+
+            for chunk in response:
+                # Token usage is reported on the final chunk
+                for metric in getattr(chunk, "metrics", None) or []:
+                    result.usage[metric.metric] = metric.value
+                if chunk.event:
+                    response_delta = chunk.event.delta
+                    if isinstance(response_delta, ToolCallDelta):
+                        retrieval_response += response_delta.tool_call.replace("====", "").strip()
+                    else:
+                        renderer.write(chunk.event.delta.text)
+            # Only a fully streamed response is cached
+            if cache_key:
+                api.cache_completion(cache_key, renderer.text)
+                debug_events.append({"type": "completion_cache", "cache": "miss", "model": settings.model})
+        result.response = renderer.close()
+        result.stream_stats = stream_stats = renderer.stats()
+        debug_events.append({
+            "type": "stream_render",
+            "time_to_first_token_s": round(stream_stats["time_to_first_token"], 3) if stream_stats["time_to_first_token"] is not None else None,
+            "stream_s": round(stream_stats["stream_seconds"], 3),
+            "render_overhead_s": round(stream_stats["render_seconds"], 3),
+            "deltas": stream_stats["deltas"],
+            "frames": stream_stats["frames"],
+        })
+        tracing.set_attributes(
+            inference_span,
+            served_from_cache=result.served_from_cache,
+            time_to_first_token_s=stream_stats["time_to_first_token"],
+            completion_tokens=result.usage.get("completion_tokens"),
+        )
+    return result
+
+
+def record_turn_latency(
+    turn_started: float,
+    endpoint: str,
+    settings: TurnSettings,
+    retrieval: Optional[RetrievalResult],
+    generation: GenerationResult,
+    debug_events: List,
+) -> dict:
+    """
+    Record the per-turn latency breakdown as the first debug event and in the metrics.
+
+    Returns:
+        dict: The turn_latency event
+    """
+    stream_stats = generation.stream_stats
+    completion_tokens = generation.usage.get("completion_tokens")
+    ttft = stream_stats["time_to_first_token"]
+    decode_seconds = stream_stats["stream_seconds"] - (ttft or 0)
+    if not generation.served_from_cache:
+        if ttft is not None:
+            metrics.TIME_TO_FIRST_TOKEN_SECONDS.labels(settings.model).observe(ttft)
+        metrics.COMPLETION_SECONDS.labels(settings.model).observe(stream_stats["stream_seconds"])
+        metrics.COMPLETION_TOKENS.labels(settings.model).inc(completion_tokens or stream_stats["deltas"])
+    retrieval = retrieval or RetrievalResult()
+    event = {
+        "type": "turn_latency",
+        "endpoint": endpoint,
+        "served_from_cache": generation.served_from_cache,
+        "retrieval_s": round(retrieval.retrieval_seconds, 3) if retrieval.retrieval_seconds is not None else None,
+        "context_packing_s": round(retrieval.packing_seconds, 3) if retrieval.packing_seconds is not None else None,
+        "time_to_first_token_s": round(ttft, 3) if ttft is not None else None,
+        "generation_s": round(stream_stats["stream_seconds"], 3),
+        "total_s": round(time.perf_counter() - turn_started, 3),
+        "context_tokens": retrieval.context.packed_tokens if retrieval.context else 0,
+        "prompt_tokens": generation.usage.get("prompt_tokens"),
+        "completion_tokens": completion_tokens,
+        # Without usage metrics each streamed delta is counted as one token
+        "tokens_per_s": round((completion_tokens or stream_stats["deltas"]) / decode_seconds, 1) if decode_seconds > 0 else None,
+    }
+    debug_events.insert(0, event)
+    return event
+
+
+def run_direct_turn(
+    api: LlamaStackApi,
+    client,
+    inference_client,
+    prompt: str,
+    vector_db_ids: List[str],
+    settings: TurnSettings,
+    renderer: StreamRenderer,
+    debug_events: Optional[List] = None,
+) -> GenerationResult:
+    """
+    Run a whole direct-mode turn without UI: retrieve, pack, generate, record latency.
+
+    Returns:
+        GenerationResult: The answer; debug_events receives the turn's events
+    """
+    debug_events = [] if debug_events is None else debug_events
+    turn_started = time.perf_counter()
+    retrieval = None
+    if vector_db_ids:
+        retrieval = retrieve_context(api, client, prompt, vector_db_ids, settings, debug_events)
+    generation = generate_answer(
+        api, inference_client, prompt, retrieval.text if retrieval else None, settings, renderer, debug_events
+    )
+    record_turn_latency(
+        turn_started, str(getattr(inference_client, "base_url", "")), settings, retrieval, generation, debug_events
+    )
+    return generation
@@ -0,0 +1,123 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import os
+import time
+from typing import Optional
+
+
+"""
+Rendering of streamed model output into a Streamlit placeholder.
+"""
+
+# Minimum seconds between two frames, and pending characters that force a frame
+STREAM_FRAME_INTERVAL = float(os.environ.get("STREAM_FRAME_INTERVAL", "0.05"))
+STREAM_FRAME_CHARS = int(os.environ.get("STREAM_FRAME_CHARS", "2048"))
+
+
+class StreamRenderer:
+    """
+    Coalesce streamed text deltas into frames rendered at a bounded rate.
+
+    Redrawing the placeholder on every token re-sends and re-parses the whole
+    growing markdown string, which is quadratic in the response length. The
+    renderer buffers deltas in a list and only redraws when frame_interval
+    seconds have passed or frame_chars characters are pending. The first
+    delta is drawn immediately so time-to-first-token is not delayed. Text is
+    only joined into a string when a frame is drawn or ``text`` is read.
+    """
+
+    def __init__(
+        self,
+        placeholder,
+        frame_interval: float = STREAM_FRAME_INTERVAL,
+        frame_chars: int = STREAM_FRAME_CHARS,
+        cursor: str = "▌",
+        started: Optional[float] = None,
+    ):
+        """
+        Args:
+            placeholder: Streamlit element with a markdown() method (e.g. st.empty())
+            frame_interval (float): Minimum seconds between frames
+            frame_chars (int): Pending characters that trigger a frame regardless of time
+            cursor (str): Suffix drawn while the stream is open
+            started (float): perf_counter() timestamp of the request, for time-to-first-token
+        """
+        self.placeholder = placeholder
+        self.frame_interval = frame_interval
+        self.frame_chars = max(1, frame_chars)
+        self.cursor = cursor
+        self.started = time.perf_counter() if started is None else started
+        # Every delta received; joined into one part whenever a string is built
+        self._parts = []
+        self._chars = 0
+        self._pending_chars = 0
+        self._last_frame = 0.0
+        self.first_token_at = None
+        self.deltas = 0
+        self.frames = 0
+        self.render_seconds = 0.0
+        self.finished_at = None
+
+    @property
+    def text(self) -> str:
+        """Full text received so far"""
+        return self._join()
+
+    def write(self, delta: str):
+        """Add a text delta, drawing a frame if one is due."""
+        if not delta:
+            return
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.deltas += 1
+        self._parts.append(delta)
+        self._chars += len(delta)
+        self._pending_chars += len(delta)
+        if (
+            self.frames == 0
+            or self._pending_chars >= self.frame_chars
+            or now - self._last_frame >= self.frame_interval
+        ):
+            self._draw(self.cursor)
+
+    def close(self) -> str:
+        """
+        Draw the final frame without the cursor.
+
+        Returns:
+            str: The complete text
+        """
+        self._draw("")
+        self.finished_at = time.perf_counter()
+        return self._join()
+
+    def _join(self) -> str:
+        # Keep the joined string as the only part so the next join starts from it
+        if len(self._parts) != 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0]
+
+    def _draw(self, suffix: str):
+        self._pending_chars = 0
+        started = time.perf_counter()
+        self.placeholder.markdown(self._join() + suffix)
+        self._last_frame = time.perf_counter()
+        self.render_seconds += self._last_frame - started
+        self.frames += 1
+
+    def stats(self) -> dict:
+        """Time to first token, stream duration and render overhead, in seconds"""
+        finished = self.finished_at or time.perf_counter()
+        return {
+            "time_to_first_token": (self.first_token_at - self.started) if self.first_token_at else None,
+            "stream_seconds": finished - self.started,
+            "render_seconds": self.render_seconds,
+            "deltas": self.deltas,
+            "frames": self.frames,
+            "chars": self._chars,
+        }
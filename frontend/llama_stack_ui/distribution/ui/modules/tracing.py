@@ -0,0 +1,165 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import atexit
+import contextlib
+import functools
+import os
+import threading
+import warnings
+from typing import Any, Callable, Optional
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+except ImportError:  # tracing extra not installed
+    otel_context = propagate = trace = None
+
+
+"""
+OpenTelemetry tracing for the UI.
+
+Tracing is off unless OTEL_TRACES_EXPORTER selects an exporter:
+
+- ``otlp``: OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (a local collector by default)
+- ``file``: one JSON span per line appended to OTEL_TRACES_FILE, for offline analysis
+- ``console``: spans printed to stdout
+
+The SDK and exporters come from the optional ``tracing`` extra; without them
+every helper here is a no-op. Outbound llama-stack requests carry the current
+trace context in W3C ``traceparent`` headers so the server side can join the
+trace.
+"""
+
+TRACES_EXPORTER = os.environ.get("OTEL_TRACES_EXPORTER", "none").lower()
+TRACES_FILE = os.environ.get("OTEL_TRACES_FILE", "/tmp/llama-stack-ui-traces.jsonl")
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "llama-stack-ui")
+
+_setup_lock = threading.Lock()
+_enabled = None
+_provider = None
+_traces_file = None
+
+
+def _build_exporter():
+    global _traces_file
+    if TRACES_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if TRACES_EXPORTER == "file":
+        # Closed by shutdown_tracing(); the exporter leaves its output open
+        _traces_file = open(TRACES_FILE, "a", buffering=1)
+        return ConsoleSpanExporter(out=_traces_file, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return ConsoleSpanExporter()
+
+
+def setup_tracing() -> bool:
+    """
+    Install the tracer provider and exporter once per process.
+
+    shutdown_tracing() is registered with atexit to flush and close them.
+
+    Returns:
+        bool: True if spans are being exported
+    """
+    global _enabled, _provider
+    with _setup_lock:
+        if _enabled is not None:
+            return _enabled
+        _enabled = False
+        if trace is None or TRACES_EXPORTER not in ("otlp", "file", "console"):
+            return _enabled
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            _provider = TracerProvider(
+                resource=Resource.create({"service.name": SERVICE_NAME}), shutdown_on_exit=False
+            )
+            _provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+            trace.set_tracer_provider(_provider)
+            atexit.register(shutdown_tracing)
+            _enabled = True
+        except Exception as e:
+            warnings.warn(f"Tracing disabled: {e}", RuntimeWarning)
+            _provider = None
+            _close_traces_file()
+        return _enabled
+
+
+def shutdown_tracing():
+    """Flush pending spans, shut down the span processor and close the traces file."""
+    global _provider
+    with _setup_lock:
+        provider, _provider = _provider, None
+    if provider is not None:
+        provider.shutdown()
+    _close_traces_file()
+
+
+def _close_traces_file():
+    global _traces_file
+    out, _traces_file = _traces_file, None
+    if out is not None:
+        out.close()
+
+
+@contextlib.contextmanager
+def span(name: str, parent: Optional[Any] = None, **attributes):
+    """
+    Run the block in a span named name.
+
+    Args:
+        name (str): Span name
+        parent: Context captured with current_context() in another thread, if any
+        **attributes: Span attributes; None values are skipped
+    """
+    if trace is None:
+        yield None
+        return
+    tracer = trace.get_tracer("llama_stack_ui")
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    with tracer.start_as_current_span(name, context=parent, attributes=attributes) as current:
+        yield current
+
+
+def set_attributes(current, **attributes):
+    """Set attributes on a span yielded by span(), ignoring None values."""
+    if current is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def current_context():
+    """Trace context of the calling thread, to hand over to another thread."""
+    return otel_context.get_current() if otel_context is not None else None
+
+
+def bind_context(fn: Callable) -> Callable:
+    """Wrap fn so it runs in the caller's trace context on a worker thread."""
+    if otel_context is None:
+        return fn
+    ctx = otel_context.get_current()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        token = otel_context.attach(ctx)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            otel_context.detach(token)
+
+    return run
+
+
+def inject_trace_headers(request):
+    """httpx request hook adding the current trace context to outbound headers."""
+    if propagate is not None:
+        propagate.inject(request.headers)
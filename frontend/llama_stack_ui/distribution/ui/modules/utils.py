@@ -5,6 +5,7 @@
 # the root directory of this source tree.
 
 import base64
+import hashlib
 import json
 import os
 
@@ -43,18 +44,58 @@ def process_dataset(file):
         return None
 
 
+# Read size for streaming file content; a multiple of 3 so base64 chunks concatenate cleanly
+FILE_READ_CHUNK_BYTES = 3 * 256 * 1024
+
+
+def iter_file_chunks(file, chunk_size: int = FILE_READ_CHUNK_BYTES):
+    """
+    Yield the content of an uploaded file in bounded chunks.
+    Reads through the file object instead of copying it with getvalue().
+    """
+    file.seek(0)
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+    file.seek(0)
+
+
+def file_content_hash(file) -> str:
+    """
+    SHA-256 hex digest of an uploaded file's bytes, computed in bounded chunks.
+    Used to detect re-uploads of unchanged documents.
+    """
+    digest = hashlib.sha256()
+    for chunk in iter_file_chunks(file):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
 def data_url_from_file(file) -> str:
     """
     Convert uploaded file content to a base64-encoded data URL.
     Used for embedding documents for vector DB ingestion.
-    """
-    file_content = file.getvalue()
-    base64_content = base64.b64encode(file_content).decode("utf-8")
-    mime_type = file.type
-
-    data_url = f"data:{mime_type};base64,{base64_content}"
 
-    return data_url
+    The content is encoded chunk by chunk into a buffer sized up front, so no
+    copy of the raw file is made. Memory is still not bounded: the buffer and
+    the returned string are each 4/3 of the file size, about 2.7x the file
+    while both are alive, before the client serializes the request. Large
+    files should go through the Files API instead (see modules.ingestion).
+    """
+    prefix = f"data:{file.type};base64,".encode("ascii")
+    size = file.size if getattr(file, "size", None) is not None else file.seek(0, os.SEEK_END)
+    encoded = bytearray(len(prefix) + 4 * -(-size // 3))
+    encoded[:len(prefix)] = prefix
+    position = len(prefix)
+    for chunk in iter_file_chunks(file):
+        chunk = base64.b64encode(chunk)
+        encoded[position:position + len(chunk)] = chunk
+        position += len(chunk)
+    del encoded[position:]
+
+    return encoded.decode("ascii")
 
 
 def get_vector_db_name(vector_db):
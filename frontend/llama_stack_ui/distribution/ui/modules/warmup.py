@@ -0,0 +1,276 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from llama_stack_ui.distribution.ui.modules.api import COMPLETION_CACHE_ENABLED, RAG_PARALLEL_RETRIEVAL, LlamaStackApi, llama_stack_api
+from llama_stack_ui.distribution.ui.modules.context import context_window_for
+from llama_stack_ui.distribution.ui.modules.pipeline import (
+    DEFAULT_TEMPERATURE,
+    TurnSettings,
+    generate_answer,
+    retrieve_context,
+)
+from llama_stack_ui.distribution.ui.modules.streaming import StreamRenderer
+
+
+"""
+Background warm-up of the RAG and completion caches for suggested questions.
+
+The questions configured in RAG_QUESTION_SUGGESTIONS are retrieved ahead of
+time so clicking a suggestion is served from the shared RAG result cache.
+Retrieval goes through the chat pipeline with the chat page's default
+settings, so the cache keys are the ones the chat will look up: per endpoint
+and per set of collections. Every collection is warmed on its own against
+LLAMA_STACK_ENDPOINT; the chat page reports the endpoint (e.g. an XC URL) and
+collection selection each session uses, and those are warmed as well.
+
+When WARMUP_ANSWER_MODEL is set, answers are precomputed too. The chat only
+reads the completion cache for greedy sampling with its cache toggle on, so
+this needs CHAT_DEFAULT_TEMPERATURE=0 and COMPLETION_CACHE_ENABLED; otherwise
+answer warm-up is skipped and the reason shows in stats().
+
+Warm-up is off unless WARMUP_ENABLED is set. It then runs once when the
+process starts (see serve.py) and again for a collection after its
+documents change; WARMUP_INTERVAL > 0 adds a periodic run, which keeps
+querying llama-stack even when the UI is idle.
+"""
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "false").lower() in ("1", "true", "yes")
+# Seconds between full re-runs (0 = only at startup and after document changes);
+# each run re-fetches the results that expired since the previous one
+WARMUP_INTERVAL = float(os.environ.get("WARMUP_INTERVAL", "0"))
+WARMUP_ANSWER_MODEL = os.environ.get("WARMUP_ANSWER_MODEL", "")
+# Endpoint and collection-set pairs reported by the chat page that are kept warm
+WARMUP_MAX_TARGETS = int(os.environ.get("WARMUP_MAX_TARGETS", "16"))
+
+
+def _load_suggestions() -> Dict[str, List[str]]:
+    try:
+        suggestions = json.loads(os.environ.get("RAG_QUESTION_SUGGESTIONS", "{}"))
+        return suggestions if isinstance(suggestions, dict) else {}
+    except json.JSONDecodeError:
+        return {}
+
+
+class _DiscardPlaceholder:
+    """Stand-in for st.empty() when answers are generated without a page."""
+
+    def markdown(self, text: str):
+        pass
+
+
+class SuggestionWarmer:
+    """
+    Daemon thread that warms the caches for the configured suggested questions.
+
+    A full warm-up runs at start, and again every ``interval`` seconds when
+    interval > 0; schedule() queues a warm-up of one collection, e.g. after
+    its documents changed, and track() adds an endpoint and collection set
+    used by the chat. Requests that arrive while a warm-up is running are
+    coalesced into the next run.
+    """
+
+    def __init__(
+        self,
+        api: LlamaStackApi,
+        interval: float = WARMUP_INTERVAL,
+        answer_model: str = WARMUP_ANSWER_MODEL,
+        max_targets: int = WARMUP_MAX_TARGETS,
+    ):
+        self.api = api
+        self.interval = interval
+        self.answer_model = answer_model
+        self.max_targets = max(0, max_targets)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = set()
+        # (endpoint, sorted vector_db_ids) reported by the chat page, least recent first
+        self._targets: "OrderedDict[Tuple[str, tuple], None]" = OrderedDict()
+        self._pending_targets = set()
+        self._thread = None
+        self._stats = {
+            "runs": 0, "retrieved": 0, "answered": 0, "errors": 0,
+            "last_run_seconds": None, "last_error": None, "answers_skipped": self._answers_skipped_reason(),
+        }
+
+    def _answers_skipped_reason(self) -> Optional[str]:
+        """Why precomputed answers would never be read by the chat, or None."""
+        if not self.answer_model:
+            return None
+        if DEFAULT_TEMPERATURE != 0:
+            return "the chat's default temperature (CHAT_DEFAULT_TEMPERATURE) is not 0"
+        if not COMPLETION_CACHE_ENABLED:
+            return "the chat's response cache is off by default (COMPLETION_CACHE_ENABLED)"
+        return None
+
+    def start(self):
+        """Start the warm-up thread once per process; later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None or not WARMUP_ENABLED:
+                return
+            self._thread = threading.Thread(target=self._run, name="suggestion-warmup", daemon=True)
+            self._thread.start()
+
+    def schedule(self, vector_db_id: str):
+        """Queue a warm-up of vector_db_id's suggestions on the warm-up thread."""
+        if not WARMUP_ENABLED:
+            return
+        with self._lock:
+            self._pending.add(vector_db_id)
+        self._wakeup.set()
+        self.start()
+
+    def track(self, client, vector_db_ids: List[str]):
+        """
+        Keep the suggestions for a chat selection warm on the endpoint of client.
+
+        Called by the chat page on every run; only a selection not seen
+        before queues a warm-up.
+        """
+        if not WARMUP_ENABLED or not vector_db_ids or not self.max_targets:
+            return
+        target = (self.api.endpoint_key(client), tuple(sorted(set(vector_db_ids))))
+        with self._lock:
+            known = target in self._targets
+            self._targets[target] = None
+            self._targets.move_to_end(target)
+            while len(self._targets) > self.max_targets:
+                self._targets.popitem(last=False)
+            if not known:
+                self._pending_targets.add(target)
+        if not known:
+            self._wakeup.set()
+            self.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _run(self):
+        vector_db_ids, targets = None, None  # First run warms everything
+        while True:
+            self.warm(vector_db_ids, targets)
+            woken = self._wakeup.wait(self.interval if self.interval > 0 else None)
+            self._wakeup.clear()
+            with self._lock:
+                vector_db_ids = set(self._pending) if woken else None
+                targets = set(self._pending_targets) if woken else None
+                self._pending.clear()
+                self._pending_targets.clear()
+
+    def _plan(self, vector_db_ids: Optional[set], targets: Optional[set]) -> List[Tuple[str, tuple]]:
+        """Endpoint and collection-set pairs to warm in this run."""
+        with self._lock:
+            tracked = list(self._targets)
+        if vector_db_ids is None and targets is None:
+            # Full run: every collection on its own on the default endpoint, plus what the chat uses
+            default_endpoint = self.api.endpoint_key()
+            vector_dbs = self.api.list_vector_dbs(refresh=True)
+            plan = [(default_endpoint, (vector_db.identifier,)) for vector_db in vector_dbs]
+            return list(dict.fromkeys(plan + tracked))
+        plan = [
+            target for target in tracked
+            if set(target[1]) & (vector_db_ids or set())
+        ]
+        plan += sorted(targets or ())
+        if vector_db_ids:
+            plan += [(self.api.endpoint_key(), (vector_db_id,)) for vector_db_id in sorted(vector_db_ids)]
+        return list(dict.fromkeys(plan))
+
+    def warm(self, vector_db_ids: Optional[set] = None, targets: Optional[set] = None) -> dict:
+        """
+        Warm the caches for suggested questions.
+
+        Args:
+            vector_db_ids: Collections whose selections to warm (with targets None: everything)
+            targets: (endpoint, vector_db_ids) selections reported by track() to warm
+
+        Returns:
+            dict: Updated warm-up statistics
+        """
+        started = time.perf_counter()
+        retrieved = answered = errors = 0
+        last_error = None
+        suggestions = _load_suggestions()
+        plan = []
+        try:
+            plan = self._plan(vector_db_ids, targets) if suggestions else []
+        except Exception as e:
+            errors, last_error = 1, str(e)
+
+        names = {}
+        for endpoint, collection_ids in plan:
+            try:
+                client = self.api.create_client_with_url(endpoint)
+                if endpoint not in names:
+                    names[endpoint] = {
+                        vector_db.identifier: getattr(vector_db, "vector_db_name", vector_db.identifier)
+                        for vector_db in self.api.list_vector_dbs(client)
+                    }
+                settings = self._settings(client)
+            except Exception as e:
+                errors += 1
+                last_error = f"{endpoint}: {e}"
+                continue
+            # The chat shows the suggestions of every selected collection
+            questions = []
+            for vector_db_id in collection_ids:
+                name = names[endpoint].get(vector_db_id, vector_db_id)
+                questions += suggestions.get(vector_db_id) or suggestions.get(name) or []
+            for question in dict.fromkeys(questions):
+                retrieval = retrieve_context(self.api, client, question, list(collection_ids), settings, [])
+                if retrieval.error:
+                    errors += 1
+                    last_error = f"{endpoint} {', '.join(collection_ids)}: {retrieval.error}"
+                    continue
+                retrieved += 1
+                if settings.use_completion_cache:
+                    try:
+                        if self._warm_answer(client, question, retrieval.text, settings):
+                            answered += 1
+                    except Exception as e:
+                        errors += 1
+                        last_error = f"{endpoint} {self.answer_model}: {e}"
+
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["retrieved"] += retrieved
+            self._stats["answered"] += answered
+            self._stats["errors"] += errors
+            self._stats["last_run_seconds"] = time.perf_counter() - started
+            if last_error:
+                self._stats["last_error"] = last_error
+            return dict(self._stats)
+
+    def _settings(self, client) -> TurnSettings:
+        """The chat page's default turn settings for the answer model on client's endpoint."""
+        answer = bool(self.answer_model) and self._answers_skipped_reason() is None
+        model = None
+        if answer:
+            model = next((m for m in self.api.list_models(client) if m.identifier == self.answer_model), None)
+        return TurnSettings(
+            model=self.answer_model,
+            parallel_retrieval=RAG_PARALLEL_RETRIEVAL,
+            use_completion_cache=answer,
+            context_window=context_window_for(model),
+        )
+
+    def _warm_answer(self, client, question: str, context: Optional[str], settings: TurnSettings) -> bool:
+        """Precompute the answer the chat would cache for question, unless it is already cached."""
+        generation = generate_answer(
+            self.api, client, question, context, settings,
+            StreamRenderer(_DiscardPlaceholder(), frame_interval=float("inf")), [],
+        )
+        return not generation.served_from_cache
+
+
+suggestion_warmer = SuggestionWarmer(llama_stack_api)
@@ -111,7 +111,7 @@ def models():
     elif not models_list:
         # Fallback to default endpoint for backward compatibility
         try:
-            models_list = llama_stack_api.client.models.list()
+            models_list = llama_stack_api.list_models()
             if models_list:
                 st.info("Using default endpoint. Configure XC URL above to use a different LlamaStack instance.")
         except Exception:
@@ -4,16 +4,32 @@
 # This source code is licensed under the terms described in the LICENSE file in
 # the root directory of this source tree.
 
-import asyncio
-import asyncpg
 import os
 import pandas as pd
 import streamlit as st
+import time
 import traceback
 
-from llama_stack_ui.distribution.ui.modules.utils import get_vector_db_name, data_url_from_file
+from llama_stack_ui.distribution.ui.modules.utils import file_content_hash, get_vector_db_name
+from llama_stack_ui.distribution.ui.modules import tracing
 from llama_stack_ui.distribution.ui.modules.api import llama_stack_api
-from llama_stack_client import RAGDocument
+from llama_stack_ui.distribution.ui.modules.ingestion import (
+    CLIENT_CHUNKING,
+    DEFAULT_CHUNK_OVERLAP_IN_TOKENS,
+    DEFAULT_CHUNK_SIZE_IN_TOKENS,
+    ChunkingSettings,
+    plan_collection_uploads,
+    store_planned_uploads,
+)
+from llama_stack_ui.distribution.ui.modules.pgvector import pgvector_store
+from llama_stack_ui.distribution.ui.modules.warmup import suggestion_warmer
+
+
+# Page size choices for the documents table
+DOCUMENT_PAGE_SIZES = [25, 50, 100, 200]
+
+# Bulk deletes of at least this many documents run in the background
+BULK_DELETE_BACKGROUND_THRESHOLD = int(os.environ.get("BULK_DELETE_BACKGROUND_THRESHOLD", "50"))
 
 
 def vector_dbs():
@@ -56,7 +72,7 @@ def vector_dbs():
         st.session_state["creation_message"] = ""
     
     # Fetch all vector databases
-    vdb_list = llama_stack_api.client.vector_dbs.list()
+    vdb_list = llama_stack_api.list_vector_dbs()
     
     # Build dropdown options based on whether databases exist
     dropdown_options = []
@@ -180,8 +196,8 @@ def _create_vector_database(vdb_name):
             st.session_state["creation_message"] = "Vector database name cannot be empty."
             return
             
-        # Check for duplicate names
-        existing_vdbs = llama_stack_api.client.vector_dbs.list()
+        # Check for duplicate names (bypass the catalog cache so the check is current)
+        existing_vdbs = llama_stack_api.list_vector_dbs(refresh=True)
         existing_names = [get_vector_db_name(vdb) for vdb in existing_vdbs]
         if vdb_name in existing_names:
             st.session_state["creation_status"] = "error"
@@ -189,7 +205,7 @@ def _create_vector_database(vdb_name):
             return
         
         # Get vector IO provider
-        providers = llama_stack_api.client.providers.list()
+        providers = llama_stack_api.list_providers()
         vector_io_provider = None
         for provider in providers:
             if provider.api == "vector_io":
@@ -209,6 +225,10 @@ def _create_vector_database(vdb_name):
                 embedding_model="all-MiniLM-L6-v2",
                 provider_id=vector_io_provider,
             )
+        llama_stack_api.invalidate_catalog("vector_dbs")
+        # Discard any catalog left by an earlier collection of the same name,
+        # then build it and start the source index up front (best effort)
+        _refresh_document_catalog(vdb_name, rebuild=True)
             
         # Success
         st.session_state["creation_status"] = "success"
@@ -258,6 +278,38 @@ def _show_document_upload_ui(vector_db_name, vector_db_obj=None):
     if upload_key not in st.session_state:
         st.session_state[upload_key] = set()
     
+    # Per-collection chunking settings, applied to the next upload
+    with st.expander("⚙️ Chunking settings", expanded=False):
+        client_side = st.toggle(
+            "Extract and chunk in the UI",
+            value=CLIENT_CHUNKING,
+            key=f"client_chunking_{vector_db_name}",
+            help="Parse txt/pdf/docx files and split them into chunks in the UI pod; llama-stack only computes embeddings",
+        )
+        chunk_size = st.number_input(
+            "Chunk size (tokens)",
+            min_value=64,
+            max_value=4096,
+            value=DEFAULT_CHUNK_SIZE_IN_TOKENS,
+            step=64,
+            key=f"chunk_size_{vector_db_name}",
+        )
+        overlap = st.number_input(
+            "Chunk overlap (tokens)",
+            min_value=0,
+            max_value=1024,
+            value=DEFAULT_CHUNK_OVERLAP_IN_TOKENS,
+            step=16,
+            key=f"chunk_overlap_{vector_db_name}",
+            disabled=not client_side,
+            help="Only applies when chunking in the UI",
+        )
+    chunking = ChunkingSettings(
+        client_side=client_side,
+        chunk_size_in_tokens=int(chunk_size),
+        overlap_in_tokens=min(int(overlap), int(chunk_size) - 1),
+    )
+    
     # File uploader
     uploaded_files = st.file_uploader(
         "Browse and select files to upload (files will upload automatically)",
@@ -269,8 +321,10 @@ def _show_document_upload_ui(vector_db_name, vector_db_obj=None):
     
     # Auto-upload when files are selected
     if uploaded_files:
-        # Create a unique identifier for this set of files
-        file_set_id = frozenset([f.name + str(f.size) for f in uploaded_files])
+        # Identify this set of files by name and content, so a changed file
+        # with the same name and size still triggers an upload
+        content_hashes = _content_hashes(uploaded_files, memo_key=f"uploader_{vector_db_name}")
+        file_set_id = frozenset(content_hashes.items())
         
         # Only process if this is a new set of files
         if file_set_id not in st.session_state[upload_key]:
@@ -283,16 +337,46 @@ def _show_document_upload_ui(vector_db_name, vector_db_obj=None):
             vector_db_id = vector_db_obj.identifier if vector_db_obj and hasattr(vector_db_obj, 'identifier') else vector_db_name
             
             # Upload automatically
-            _upload_documents_to_database(vector_db_name, uploaded_files, vector_db_id)
+            _upload_documents_to_database(vector_db_name, uploaded_files, vector_db_id, content_hashes, chunking)
+
+
+def _content_hashes(uploaded_files, memo_key=None):
+    """
+    Content hash of each uploaded file.
+    
+    Args:
+        uploaded_files (list): The selected files
+        memo_key (str): Key of the upload widget; its files' hashes are kept
+            across reruns. Only the current selection is kept, so the memo
+            never outgrows what the widget holds.
+    
+    Returns:
+        dict: filename -> SHA-256 hex digest
+    """
+    state_key = f"upload_content_hashes_{memo_key}"
+    previous = st.session_state.get(state_key, {}) if memo_key else {}
+    memo, hashes = {}, {}
+    for uploaded_file in uploaded_files:
+        file_key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+        memo[file_key] = previous[file_key] if file_key in previous else file_content_hash(uploaded_file)
+        hashes[uploaded_file.name] = memo[file_key]
+    if memo_key:
+        st.session_state[state_key] = memo
+    return hashes
 
 
-def _upload_documents_to_database(vector_db_name, uploaded_files, vector_db_id=None):
+def _upload_documents_to_database(vector_db_name, uploaded_files, vector_db_id=None, content_hashes=None, chunking=None):
     """
     Upload documents to an existing vector database.
     
+    Files whose content is already stored (under the same or another name)
+    are skipped; changed files replace their previous version.
+    
     Args:
         vector_db_name (str): Name of the target vector database
         uploaded_files: List of uploaded files from Streamlit file uploader
+        content_hashes (dict): filename -> content hash, computed if not given
+        chunking (ChunkingSettings): Chunk size/overlap and where chunking runs
     """
     try:
         # Reset status
@@ -304,29 +388,68 @@ def _upload_documents_to_database(vector_db_name, uploaded_files, vector_db_id=N
             st.session_state["upload_message"] = "No files selected for upload."
             return
         
-        # Convert uploaded files into RAGDocument instances
-        with st.spinner(f"Processing {len(uploaded_files)} file(s)..."):
-            documents = [
-                RAGDocument(
-                    document_id=uploaded_file.name,
-                    content=data_url_from_file(uploaded_file),
-                    metadata={"source": uploaded_file.name, "type": "uploaded_file"}  # LlamaStack maps 'source' to chunk_metadata.source
-                )
-                for uploaded_file in uploaded_files
-            ]
-        
-        # Insert documents into the existing vector database
         actual_db_id = vector_db_id or vector_db_name
-        with st.spinner(f"Uploading documents to '{vector_db_name}'..."):
-            llama_stack_api.client.tool_runtime.rag_tool.insert(
-                vector_db_id=actual_db_id,  # Use the correct database ID
-                documents=documents,
-                chunk_size_in_tokens=512,
+        content_hashes = content_hashes or _content_hashes(uploaded_files)
+        
+        # Skip files whose bytes are already embedded in this database
+        plan = plan_collection_uploads(pgvector_store, actual_db_id, uploaded_files, content_hashes)
+        skipped_note = ""
+        if plan.skipped:
+            skipped_note = " Skipped: " + "; ".join(f"{filename} ({reason})" for filename, reason in plan.skipped.items()) + "."
+        if not plan.to_ingest:
+            st.session_state["upload_status"] = "success"
+            st.session_state["upload_message"] = f"All {len(uploaded_files)} document(s) are already up to date in '{vector_db_name}'.{skipped_note}"
+            st.rerun()
+        uploaded_files = plan.to_ingest
+        
+        # Insert documents into the existing vector database in concurrent
+        # batches, reporting per-file progress as batches complete
+        progress_bar = st.progress(0.0, text=f"Uploading documents to '{vector_db_name}'...")
+        started = time.perf_counter()
+        
+        def on_progress(files_done, files_total, batch_results):
+            elapsed = time.perf_counter() - started
+            failed = [filename for filename, error in batch_results.items() if error]
+            progress_bar.progress(
+                files_done / files_total,
+                text=(
+                    f"Uploaded {files_done}/{files_total} file(s) "
+                    f"({files_done / elapsed if elapsed else 0:.2f} docs/s)"
+                    + (f" - failed: {', '.join(failed)}" if failed else "")
+                ),
             )
         
-        # Success
-        st.session_state["upload_status"] = "success"
-        st.session_state["upload_message"] = f"Successfully uploaded {len(uploaded_files)} document(s) to '{vector_db_name}'!"
+        with tracing.span("vector_db.upload", vector_db_id=actual_db_id, documents=len(uploaded_files)) as upload_span:
+            # Stores the new chunks, then prunes replaced versions and
+            # refreshes the document catalog
+            upload_stats = store_planned_uploads(
+                llama_stack_api.client,
+                pgvector_store,
+                actual_db_id,  # Use the correct database ID
+                plan,
+                content_hashes,
+                chunking=chunking,
+                on_progress=on_progress,
+            )
+            tracing.set_attributes(upload_span, failed=upload_stats.failed, bytes_read=upload_stats.bytes_read)
+        llama_stack_api.invalidate_catalog("vector_dbs")
+        # Answers retrieved from the previous contents are stale now
+        _documents_changed(actual_db_id)
+        
+        if upload_stats.errors:
+            failures = "; ".join(f"{filename}: {error}" for filename, error in upload_stats.errors.items())
+            st.session_state["upload_status"] = "error"
+            st.session_state["upload_message"] = (
+                f"Uploaded {upload_stats.documents} of {len(uploaded_files)} document(s) to '{vector_db_name}'. "
+                f"Failed: {failures} ({upload_stats.summary()}){skipped_note}"
+            )
+        else:
+            # Success
+            st.session_state["upload_status"] = "success"
+            st.session_state["upload_message"] = (
+                f"Successfully uploaded {len(uploaded_files)} document(s) to '{vector_db_name}'! "
+                f"({upload_stats.summary()}){skipped_note}"
+            )
         
         # Trigger refresh to show the success message
         st.rerun()
@@ -337,85 +460,113 @@ def _upload_documents_to_database(vector_db_name, uploaded_files, vector_db_id=N
         st.rerun()
 
 
-def _get_documents_from_pgvector(vector_db_id):
+def _get_document_page_from_pgvector(vector_db_id, after=None, limit=50, search=None):
     """
-    Query pgvector directly to get document IDs stored in the database.
+    Get one page of documents from the pgvector document catalog.
     
     Args:
         vector_db_id (str): The vector database identifier
+        after (str): Keyset cursor - last filename of the previous page
+        limit (int): Number of documents per page
+        search (str): Case-insensitive filename filter, applied in SQL
         
     Returns:
-        list: List of unique document IDs, or None if query fails
+        tuple: ([(filename, chunk_count), ...], has_more, total), or None if query fails
     """
     try:
-        # Get pgvector connection details from environment or defaults
-        pg_host = os.environ.get("PGVECTOR_HOST", "pgvector")
-        pg_port = os.environ.get("PGVECTOR_PORT", "5432")
-        pg_user = os.environ.get("PGVECTOR_USER", "postgres")
-        pg_password = os.environ.get("PGVECTOR_PASSWORD", "rag_password")
-        pg_database = os.environ.get("PGVECTOR_DB", "rag_blueprint")
-        
-        async def fetch_documents():
-            try:
-                # Connect to PostgreSQL
-                conn = await asyncpg.connect(
-                    host=pg_host,
-                    port=pg_port,
-                    user=pg_user,
-                    password=pg_password,
-                    database=pg_database
-                )
-                
-                # Query for unique document IDs from the document JSONB column
-                # The vector_db_id is used as the table name with underscores replacing hyphens
-                table_name = f"vs_{vector_db_id.replace('-', '_')}"
-                
-                # Query chunk_metadata.source where LlamaStack stores the filename
-                # Fall back to auto-generated document_id if source is null
-                query = f"""
-                    SELECT DISTINCT 
-                        COALESCE(
-                            NULLIF(document->'chunk_metadata'->>'source', 'null'),
-                            document->'metadata'->>'document_id'
-                        ) as document_id
-                    FROM {table_name}
-                    WHERE document->'metadata'->>'document_id' IS NOT NULL
-                    ORDER BY document_id
-                """
-                
-                queries = [query]
-                
-                doc_ids = []
-                for query in queries:
-                    try:
-                        rows = await conn.fetch(query)
-                        if rows:
-                            doc_ids = [row['document_id'] for row in rows if row['document_id']]
-                            if doc_ids:
-                                break
-                    except Exception as e:
-                        continue  # Try next query pattern
-                
-                await conn.close()
-                return doc_ids if doc_ids else None
-                
-            except Exception as e:
-                return None
-        
-        # Run the async function
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        return pgvector_store.list_documents_page(vector_db_id, after=after, limit=limit, search=search or None)
+    except Exception as e:
+        return None
+
+
+def _delete_documents_from_pgvector(vector_db_id, filenames):
+    """
+    Delete several documents and all their chunks from pgvector in one transaction.
+    
+    Args:
+        vector_db_id (str): The vector database identifier
+        filenames (list): The filenames/sources to delete
         
-        return loop.run_until_complete(fetch_documents())
+    Returns:
+        tuple: (success: bool, deleted_counts: dict, error_message: str)
+    """
+    try:
+        deleted_counts = pgvector_store.delete_documents(vector_db_id, filenames)
+        if any(deleted_counts.values()):
+            llama_stack_api.invalidate_catalog("vector_dbs")
+            _documents_changed(vector_db_id)
+        return True, deleted_counts, None
+    except Exception as e:
+        return False, {}, str(e)
+
+
+def _submit_bulk_delete(vector_db_id, filenames):
+    """
+    Start a bulk delete in the background.
+    
+    Returns:
+        concurrent.futures.Future: Resolves to the per-filename deleted chunk counts
+    """
+    future = pgvector_store.delete_documents(vector_db_id, filenames, wait=False)
+    
+    def on_done(done_future):
+        if not done_future.exception():
+            llama_stack_api.invalidate_catalog("vector_dbs")
+            _documents_changed(vector_db_id)
+    
+    future.add_done_callback(on_done)
+    return future
+
+
+def _record_bulk_delete_result(success, deleted_counts, error):
+    """
+    Store the outcome of a bulk delete as the status message shown on the next run.
+    """
+    if not success:
+        st.session_state["delete_status"] = "error"
+        st.session_state["delete_message"] = f"❌ Failed to delete selected documents: {error}"
+        return
+    
+    deleted = {doc_id: count for doc_id, count in deleted_counts.items() if count}
+    missing = [doc_id for doc_id, count in deleted_counts.items() if not count]
+    message = f"✅ Deleted {len(deleted)} document(s) ({sum(deleted.values())} chunk(s) removed)"
+    if len(deleted) <= 10:
+        message += "".join(f"\n- {doc_id}: {count} chunk(s)" for doc_id, count in deleted.items())
+    if missing:
+        message += f"\n\n{len(missing)} document(s) were already gone: {', '.join(missing[:10])}"
+    st.session_state["delete_status"] = "success"
+    st.session_state["delete_message"] = message
+
+
+def _documents_changed(vector_db_id):
+    """
+    Drop cached RAG results for a collection whose documents changed and
+    re-warm its suggested questions in the background.
+    """
+    llama_stack_api.invalidate_rag_cache(vector_db_id)
+    suggestion_warmer.schedule(vector_db_id)
+
+
+def _refresh_document_catalog(vector_db_id, rebuild=False):
+    """
+    Make sure the pgvector document catalog of a collection exists.
+    
+    Uploads and deletes keep the catalog rows of the documents they touch
+    current themselves; this is for building it up front or recomputing it.
+    
+    Args:
+        vector_db_id (str): The vector database identifier
+        rebuild (bool): Recompute the whole catalog from the chunk table
         
-    except ImportError:
-        # asyncpg not available
-        return None
+    Returns:
+        bool: True if the catalog was updated, False otherwise
+    """
+    try:
+        pgvector_store.ensure_catalog(vector_db_id, rebuild=rebuild)
+        return True
     except Exception as e:
-        return None
+        # pgvector may be unreachable; the catalog is built on first listing
+        return False
 
 
 def _delete_document_from_pgvector(vector_db_id, filename):
@@ -430,57 +581,11 @@ def _delete_document_from_pgvector(vector_db_id, filename):
         tuple: (success: bool, deleted_count: int, error_message: str)
     """
     try:
-        # Get pgvector connection details from environment or defaults
-        pg_host = os.environ.get("PGVECTOR_HOST", "pgvector")
-        pg_port = os.environ.get("PGVECTOR_PORT", "5432")
-        pg_user = os.environ.get("PGVECTOR_USER", "postgres")
-        pg_password = os.environ.get("PGVECTOR_PASSWORD", "rag_password")
-        pg_database = os.environ.get("PGVECTOR_DB", "rag_blueprint")
-        
-        async def delete_document():
-            try:
-                # Connect to PostgreSQL
-                conn = await asyncpg.connect(
-                    host=pg_host,
-                    port=pg_port,
-                    user=pg_user,
-                    password=pg_password,
-                    database=pg_database
-                )
-                
-                # The vector_db_id is used as the table name with underscores replacing hyphens
-                table_name = f"vs_{vector_db_id.replace('-', '_')}"
-                
-                # Delete all chunks where the source matches the filename
-                query = f"""
-                    DELETE FROM {table_name}
-                    WHERE document->'chunk_metadata'->>'source' = $1
-                """
-                
-                result = await conn.execute(query, filename)
-                
-                await conn.close()
-                
-                # Parse the result to get the number of deleted rows
-                # Result format is like "DELETE 5" where 5 is the number of rows
-                deleted_count = int(result.split()[-1]) if result else 0
-                
-                return True, deleted_count, None
-                
-            except Exception as e:
-                return False, 0, str(e)
-        
-        # Run the async function
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        return loop.run_until_complete(delete_document())
-        
-    except ImportError:
-        return False, 0, "asyncpg module not available"
+        deleted_count = pgvector_store.delete_document(vector_db_id, filename)
+        if deleted_count:
+            llama_stack_api.invalidate_catalog("vector_dbs")
+            _documents_changed(vector_db_id)
+        return True, deleted_count, None
     except Exception as e:
         return False, 0, str(e)
 
@@ -506,6 +611,17 @@ def _show_existing_documents_table(vector_db_name, vector_db_obj=None):
         if "delete_message" not in st.session_state:
             st.session_state["delete_message"] = ""
         
+        # Collect the result of a background bulk delete once it has finished
+        job_key = f"bulk_delete_job_{vector_db_name}"
+        bulk_delete_job = st.session_state.get(job_key)
+        if bulk_delete_job and bulk_delete_job["future"].done():
+            del st.session_state[job_key]
+            try:
+                _record_bulk_delete_result(True, bulk_delete_job["future"].result(), None)
+            except Exception as e:
+                _record_bulk_delete_result(False, {}, str(e))
+            bulk_delete_job = None
+        
         # Show deletion status messages (before checking documents, so last delete shows)
         if st.session_state["delete_status"] == "success":
             st.success(st.session_state["delete_message"])
@@ -516,30 +632,138 @@ def _show_existing_documents_table(vector_db_name, vector_db_obj=None):
             st.session_state["delete_status"] = None
             st.session_state["delete_message"] = ""
         
+        # Paging state for this database: a stack of keyset cursors, one per
+        # visited page (None = first page). Search and page size live in the
+        # widget keys and reset paging when changed.
+        cursor_key = f"doc_page_cursors_{vector_db_name}"
+        search_key = f"doc_search_{vector_db_name}"
+        page_size_key = f"doc_page_size_{vector_db_name}"
+        if cursor_key not in st.session_state:
+            st.session_state[cursor_key] = [None]
+        cursors = st.session_state[cursor_key]
+        
+        # Documents ticked for bulk deletion; kept across pages
+        selection_key = f"doc_selection_{vector_db_name}"
+        if selection_key not in st.session_state:
+            st.session_state[selection_key] = set()
+        selection = st.session_state[selection_key]
+        
+        def toggle_selection(doc_id, checkbox_key):
+            if st.session_state[checkbox_key]:
+                selection.add(doc_id)
+            else:
+                selection.discard(doc_id)
+        
+        if bulk_delete_job:
+            st.info(f"🗑️ Deleting {len(bulk_delete_job['sources'])} document(s) in the background...")
+            if st.button("Check status", key=f"bulk_delete_status_{vector_db_name}"):
+                st.rerun()
+        
+        def reset_paging():
+            st.session_state[cursor_key] = [None]
+        
+        search = st.session_state.get(search_key, "").strip()
+        page_size = st.session_state.get(page_size_key, DOCUMENT_PAGE_SIZES[0])
+        
         with st.spinner("Checking for documents..."):
-            # First, try to get document list from pgvector directly
-            document_ids = _get_documents_from_pgvector(vector_db_id)
+            # First, try to get one page of the document list from pgvector directly
+            document_page = _get_document_page_from_pgvector(vector_db_id, cursors[-1], page_size, search)
             
-            if document_ids:
+            if document_page and (document_page[2] or search):
+                documents, has_more, total = document_page
+                
+                # A delete can leave us past the last page; step back
+                if not documents and len(cursors) > 1:
+                    cursors.pop()
+                    st.rerun()
+                
                 # Success! We have the actual document filenames
                 # Show heading for documents section
                 st.subheader(f"📄 Documents in '{vector_db_name}'")
                 
+                search_col, size_col, refresh_col = st.columns([4, 1.2, 1])
+                with search_col:
+                    st.text_input(
+                        "Search filenames",
+                        key=search_key,
+                        on_change=reset_paging,
+                        placeholder="Search filenames...",
+                        label_visibility="collapsed",
+                    )
+                with size_col:
+                    st.selectbox(
+                        "Page size",
+                        DOCUMENT_PAGE_SIZES,
+                        key=page_size_key,
+                        on_change=reset_paging,
+                        format_func=lambda size: f"{size} / page",
+                        label_visibility="collapsed",
+                    )
+                with refresh_col:
+                    # The list comes from the document catalog; allow a rebuild in case
+                    # documents were added or removed outside this UI
+                    if st.button("🔄 Refresh", key=f"refresh_catalog_{vector_db_name}", help="Rebuild the document list from the database"):
+                        _refresh_document_catalog(vector_db_id, rebuild=True)
+                        _documents_changed(vector_db_id)
+                        reset_paging()
+                        st.rerun()
+                
+                if not documents:
+                    st.info(f"No documents match '{search}'.")
+                    return
+                
+                # Bulk delete of all ticked documents in a single transaction
+                if selection:
+                    select_col, action_col = st.columns([4, 2.2])
+                    with select_col:
+                        st.caption(f"{len(selection)} document(s) selected")
+                    with action_col:
+                        if st.button(
+                            f"🗑️ Delete selected ({len(selection)})",
+                            key=f"bulk_delete_{vector_db_name}",
+                            disabled=bool(bulk_delete_job),
+                            use_container_width=True,
+                        ):
+                            sources = sorted(selection)
+                            selection.clear()
+                            if len(sources) >= BULK_DELETE_BACKGROUND_THRESHOLD:
+                                st.session_state[job_key] = {
+                                    "future": _submit_bulk_delete(vector_db_id, sources),
+                                    "sources": sources,
+                                }
+                            else:
+                                _record_bulk_delete_result(*_delete_documents_from_pgvector(vector_db_id, sources))
+                            st.rerun()
+                
                 # Display documents in a table with delete buttons
                 # Display table header
-                col1, col2, col3 = st.columns([0.5, 5, 0.5])
+                col0, col1, col2, col3, col4 = st.columns([0.4, 0.5, 4, 1, 0.5])
                 with col1:
                     st.markdown("**#**")
                 with col2:
                     st.markdown("**Filename**")
                 with col3:
+                    st.markdown("**Chunks**")
+                with col4:
                     st.markdown("**Del**")
                 
                 st.divider()
                 
-                # Display each document in a row with delete button
-                for idx, doc_id in enumerate(document_ids, start=1):
-                    col1, col2, col3 = st.columns([0.5, 5, 0.5])
+                # Display each document of the current page in a row with delete button
+                offset = (len(cursors) - 1) * page_size
+                for idx, (doc_id, chunk_count) in enumerate(documents, start=offset + 1):
+                    col0, col1, col2, col3, col4 = st.columns([0.4, 0.5, 4, 1, 0.5])
+                    
+                    with col0:
+                        checkbox_key = f"select_{vector_db_name}_{doc_id}"
+                        st.checkbox(
+                            f"Select {doc_id}",
+                            value=doc_id in selection,
+                            key=checkbox_key,
+                            on_change=toggle_selection,
+                            args=(doc_id, checkbox_key),
+                            label_visibility="collapsed",
+                        )
                     
                     with col1:
                         st.write(idx)
@@ -548,6 +772,9 @@ def _show_existing_documents_table(vector_db_name, vector_db_obj=None):
                         st.write(doc_id)
                     
                     with col3:
+                        st.write(chunk_count)
+                    
+                    with col4:
                         delete_key = f"delete_{vector_db_name}_{doc_id}_{idx}"
                         
                         if st.button("✕", key=delete_key, help=f"Delete {doc_id}"):
@@ -558,6 +785,7 @@ def _show_existing_documents_table(vector_db_name, vector_db_obj=None):
                             )
                             
                             if success:
+                                selection.discard(doc_id)
                                 st.session_state["delete_status"] = "success"
                                 st.session_state["delete_message"] = f"✅ Successfully deleted '{doc_id}' ({deleted_count} chunk(s) removed)"
                             else:
@@ -566,6 +794,21 @@ def _show_existing_documents_table(vector_db_name, vector_db_obj=None):
                             
                             st.rerun()
                 
+                # Keyset pagination controls
+                prev_col, info_col, next_col = st.columns([1, 3, 1])
+                with prev_col:
+                    if st.button("← Previous", key=f"doc_prev_{vector_db_name}", disabled=len(cursors) == 1, use_container_width=True):
+                        cursors.pop()
+                        st.rerun()
+                with info_col:
+                    st.caption(f"Showing {offset + 1}–{offset + len(documents)} of {total} document(s)")
+                    if pgvector_store.source_index_state(vector_db_id) == "building":
+                        st.caption("Indexing document names in the background; listings may be slow until it finishes.")
+                with next_col:
+                    if st.button("Next →", key=f"doc_next_{vector_db_name}", disabled=not has_more, use_container_width=True):
+                        cursors.append(documents[-1][0])
+                        st.rerun()
+                
             else:
                 # Fallback: Try a simple query to see if documents exist
                 try:
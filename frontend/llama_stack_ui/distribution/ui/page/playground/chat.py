@@ -6,6 +6,8 @@
 
 import enum
 import json
+import os
+import time
 import uuid
 from itertools import tee
 
@@ -14,24 +16,59 @@ from llama_stack_client.lib.agents.agent import Agent
 from llama_stack_client.lib.agents.event_logger import  EventLogger
 from llama_stack_client.lib.agents.react.agent import ReActAgent
 from llama_stack_client.lib.agents.react.tool_parser import ReActOutput
-from llama_stack.apis.common.content_types import ToolCallDelta
-from llama_stack_ui.distribution.ui.modules.api import llama_stack_api
+from llama_stack_ui.distribution.ui.modules import tracing
+from llama_stack_ui.distribution.ui.modules.api import COMPLETION_CACHE_ENABLED, RAG_PARALLEL_RETRIEVAL, llama_stack_api
+from llama_stack_ui.distribution.ui.modules.context import DEFAULT_SYSTEM_PROMPT, RAG_COLLECTION_TOP_K, context_window_for
+from llama_stack_ui.distribution.ui.modules.pipeline import (
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_REPETITION_PENALTY,
+    DEFAULT_TEMPERATURE,
+    DEFAULT_TOP_P,
+    TurnSettings,
+    generate_answer,
+    record_turn_latency,
+    retrieve_context,
+)
+from llama_stack_ui.distribution.ui.modules.streaming import StreamRenderer
 from llama_stack_ui.distribution.ui.modules.utils import get_suggestions_for_databases, get_vector_db_name
+from llama_stack_ui.distribution.ui.modules.warmup import suggestion_warmer
 from llama_stack_client.types import UserMessage
 from llama_stack_client.types.shared_params import SamplingParams
 from llama_stack_client.types.shared_params.response_format import JsonSchemaResponseFormat
 from llama_stack_client.types.shared_params.sampling_params import StrategyTopPSamplingStrategy
 
 
+# Number of most recent turns rendered in full; older turns are collapsed
+HISTORY_WINDOW_TURNS = int(os.environ.get("HISTORY_WINDOW_TURNS", "10"))
+# Collapsed turns listed in the "earlier turns" summary
+HISTORY_SUMMARY_TURNS = 20
+
+
 class AgentType(enum.Enum):
     REGULAR = "Regular"
     REACT = "ReAct"
 
-def get_strategy(temperature, top_p):
-    """Determines the sampling strategy for the LLM based on temperature."""
-    return {'type': 'greedy'} if temperature == 0 else {
-            'type': 'top_p', 'temperature': temperature, 'top_p': top_p
-        }
+def _summarize_text(text, limit=80):
+    """Text collapsed to a single line and shortened to limit characters."""
+    line = " ".join(str(text).split())
+    return line if len(line) <= limit else line[:limit - 1] + "…"
+
+
+def _render_collapsed_turns(messages):
+    """Render older messages as a single lightweight list of one-line summaries."""
+    turns = [messages[i:i + 2] for i in range(0, len(messages), 2)]
+    with st.expander(f"🕘 {len(turns)} earlier turn(s)", expanded=False):
+        lines = []
+        for turn in turns[-HISTORY_SUMMARY_TURNS:]:
+            question = _summarize_text(turn[0]["content"])
+            answer = _summarize_text(turn[1]["content"]) if len(turn) > 1 else ""
+            lines.append(f"- **{question}** — {answer}")
+        if len(turns) > HISTORY_SUMMARY_TURNS:
+            lines.insert(0, f"_…{len(turns) - HISTORY_SUMMARY_TURNS} older turn(s) not shown_")
+        st.markdown("\n".join(lines))
+    if st.button("⬆️ Load earlier messages", key="history_load_earlier"):
+        st.session_state.history_window_turns += HISTORY_WINDOW_TURNS
+        st.rerun()
 
 
 def render_history(tool_debug):
@@ -44,8 +81,25 @@ def render_history(tool_debug):
     # Initialize debug_events in the session state if not present
     if 'debug_events' not in st.session_state:
          st.session_state.debug_events = []
+    if 'history_window_turns' not in st.session_state:
+        st.session_state.history_window_turns = HISTORY_WINDOW_TURNS
+
+    # Only the last history_window_turns turns are rendered in full, so the
+    # cost of a rerun does not grow with the length of the conversation.
+    # messages: [A_initial, U_1, A_1, U_2, A_2, ...]; a window starts at a user message.
+    messages = st.session_state.messages
+    first_visible = max(1, len(messages) - 2 * st.session_state.history_window_turns)
+    if first_visible % 2 == 0:
+        first_visible -= 1
+    if first_visible > 1:
+        with st.chat_message(messages[0]['role']):
+            st.markdown(messages[0]['content'])
+        _render_collapsed_turns(messages[1:first_visible])
+    else:
+        first_visible = 0
 
-    for i, msg in enumerate(st.session_state.messages):
+    for i in range(first_visible, len(messages)):
+        msg = messages[i]
         with st.chat_message(msg['role']):
             st.markdown(msg['content'])
 
@@ -99,22 +153,21 @@ def tool_chat_page():
             return [model.identifier for model in llm_models]
         else:
             # Fallback to default endpoint
-            client = llama_stack_api.client
-            models = client.models.list()
+            models = llama_stack_api.list_models()
             return [model.identifier for model in models if model.api_model_type == "llm"]
     
     model_list = get_available_models()
 
     # Determine which client to use based on XC URL configuration
     if "xc_url" in st.session_state and st.session_state.get("xc_url"):
-        # Use XC URL client for all operations
+        # Use the pooled XC URL client for all operations
         xc_url = st.session_state["xc_url"]
         client = llama_stack_api.create_client_with_url(xc_url)
     else:
         # Use default endpoint client
         client = llama_stack_api.client
     
-    tool_groups = client.toolgroups.list()
+    tool_groups = llama_stack_api.list_toolgroups(client)
     tool_groups_list = [tool_group.identifier for tool_group in tool_groups]
     mcp_tools_list = [tool for tool in tool_groups_list if tool.startswith("mcp::")]
     builtin_tools_list = [tool for tool in tool_groups_list if not tool.startswith("mcp::")]
@@ -138,7 +191,7 @@ def tool_chat_page():
         
         # Document Collections selection - single, clean selector
         # Always fetch vector DBs from local endpoint (pgvector is local, not on XC)
-        vector_dbs = llama_stack_api.client.vector_dbs.list() or []
+        vector_dbs = llama_stack_api.list_vector_dbs() or []
         if not vector_dbs:
             st.info("No vector databases available for selection.")
         vector_db_names = [get_vector_db_name(vector_db) for vector_db in vector_dbs]
@@ -147,6 +200,21 @@ def tool_chat_page():
             options=vector_db_names,
             on_change=reset_agent,
         )
+        parallel_retrieval = st.toggle(
+            "Query Collections in Parallel",
+            value=RAG_PARALLEL_RETRIEVAL,
+            disabled=len(selected_vector_dbs) < 2,
+            help=f"Query each collection separately with its own timeout and keep the best {RAG_COLLECTION_TOP_K} chunks of each; a slow or failing collection is skipped.",
+        )
+        if selected_vector_dbs:
+            # Let the warmer precompute suggestions for this endpoint and selection
+            suggestion_warmer.track(
+                client,
+                [
+                    vector_db.identifier for vector_db in llama_stack_api.list_vector_dbs(client) or []
+                    if get_vector_db_name(vector_db) in selected_vector_dbs
+                ],
+            )
 
         # Display MCP servers list if available
         if len(mcp_tools_list) > 0:
@@ -160,13 +228,14 @@ def tool_chat_page():
             )
             toolgroup_selection.extend(mcp_selection)
 
-            grouped_tools = {}
-            total_tools = 0
-
-            for toolgroup_id in toolgroup_selection:
-                tools = client.tools.list(toolgroup_id=toolgroup_id)
-                grouped_tools[toolgroup_id] = [tool.identifier for tool in tools]
-                total_tools += len(tools)
+            # Fetch tools for all selected toolgroups concurrently; a slow or
+            # failing MCP server only drops its own group from the listing
+            tools_by_group, tool_errors = llama_stack_api.list_tools_for_toolgroups(toolgroup_selection, client)
+            grouped_tools = {
+                toolgroup_id: [tool.identifier for tool in tools]
+                for toolgroup_id, tools in tools_by_group.items()
+            }
+            total_tools = sum(len(tools) for tools in grouped_tools.values())
 
             st.markdown(f"Active Tools: 🛠 {total_tools}")
 
@@ -175,6 +244,9 @@ def tool_chat_page():
                     for idx, tool in enumerate(tools, start=1):
                         st.markdown(f"{idx}. `{tool.split(':')[-1]}`")
 
+            for group_id, error in tool_errors.items():
+                st.caption(f"⚠️ Tools from `{group_id}` unavailable: {error}")
+
             # st.subheader("Agent Configurations")
             # st.subheader("Agent Type")
             # agent_type = st.radio(
@@ -194,13 +266,13 @@ def tool_chat_page():
             output_shields = []
 
         st.subheader("Sampling Parameters")
-        temperature = st.slider("Temperature", 0.0, 2.0, 0.1, 0.05, on_change=reset_agent)
-        top_p = st.slider("Top P", 0.0, 1.0, 0.95, 0.05, on_change=reset_agent)
-        max_tokens = st.slider("Max Tokens", 1, 4096, 512, 64, on_change=reset_agent)
-        repetition_penalty = st.slider("Repetition Penalty", 1.0, 2.0, 1.0, 0.05, on_change=reset_agent)
+        temperature = st.slider("Temperature", 0.0, 2.0, DEFAULT_TEMPERATURE, 0.05, on_change=reset_agent)
+        top_p = st.slider("Top P", 0.0, 1.0, DEFAULT_TOP_P, 0.05, on_change=reset_agent)
+        max_tokens = st.slider("Max Tokens", 1, 4096, DEFAULT_MAX_TOKENS, 64, on_change=reset_agent)
+        repetition_penalty = st.slider("Repetition Penalty", 1.0, 2.0, DEFAULT_REPETITION_PENALTY, 0.05, on_change=reset_agent)
 
         st.subheader("System Prompt")
-        default_prompt = "You are a helpful AI assistant."
+        default_prompt = DEFAULT_SYSTEM_PROMPT
         system_prompt = st.text_area(
             "System Prompt", value=default_prompt, on_change=reset_agent, height=100
         )
@@ -208,6 +280,23 @@ def tool_chat_page():
         st.subheader("Response Handling")
         #stream_opt = st.toggle("Stream Response", value=True, on_change=reset_agent)
         tool_debug = st.toggle("Show Tool/Debug Info", value=False)
+        use_completion_cache = st.toggle(
+            "Reuse Cached Responses",
+            value=COMPLETION_CACHE_ENABLED,
+            disabled=temperature != 0,
+            help="At temperature 0 answers are deterministic: replay an identical earlier answer instead of calling the model again. Turn off to bypass the cache.",
+        )
+        if tool_debug:
+            rag_cache_stats = llama_stack_api.rag_cache_stats()
+            st.caption(
+                f"RAG cache: {rag_cache_stats['hit_rate']:.0%} hit rate "
+                f"({rag_cache_stats['hits']} hits, {rag_cache_stats['misses']} misses, {rag_cache_stats['size']} cached)"
+            )
+            completion_cache_stats = llama_stack_api.completion_cache_stats()
+            st.caption(
+                f"Response cache: {completion_cache_stats['hit_rate']:.0%} hit rate "
+                f"({completion_cache_stats['hits']} hits, {completion_cache_stats['misses']} misses, {completion_cache_stats['size']} cached)"
+            )
 
         if st.button("Clear Chat & Reset Config", use_container_width=True):
             reset_agent()
@@ -276,7 +365,7 @@ def tool_chat_page():
         if not selected_vector_dbs:
             return
         
-        vector_dbs = llama_stack_api.client.vector_dbs.list() or []
+        vector_dbs = llama_stack_api.list_vector_dbs() or []
         suggestions = get_suggestions_for_databases(selected_vector_dbs, vector_dbs)
         
         if not suggestions:
@@ -522,71 +611,57 @@ def tool_chat_page():
         st.session_state.messages.append({"role": "assistant", "content": response_content})
 
 
+    def get_context_window(model_id):
+        # Same model source as get_available_models
+        if "xc_url" in st.session_state and st.session_state.get("models_list"):
+            models_list = st.session_state["models_list"]
+        else:
+            models_list = llama_stack_api.list_models()
+        model_obj = next((m for m in models_list if getattr(m, "identifier", None) == model_id), None)
+        return context_window_for(model_obj)
+
     def direct_process_prompt(prompt, debug_events_list, inference_client):
+        turn_started = time.perf_counter()
+        settings = TurnSettings(
+            model=model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            repetition_penalty=repetition_penalty,
+            parallel_retrieval=parallel_retrieval,
+            use_completion_cache=use_completion_cache,
+            context_window=get_context_window(model),
+        )
+        retrieval = None
         # Query the vector DB
         if selected_vector_dbs:
-            vector_dbs = client.vector_dbs.list() or []
+            vector_dbs = llama_stack_api.list_vector_dbs(client) or []
             vector_db_ids = [vector_db.identifier for vector_db in vector_dbs if get_vector_db_name(vector_db) in selected_vector_dbs]
             with st.spinner("Retrieving context (RAG)..."):
-                try:
-                    rag_response = client.tool_runtime.rag_tool.query(
-                        content=prompt, vector_db_ids=list(vector_db_ids)
-                    )
-                    prompt_context = rag_response.content
-                    debug_events_list.append({
-                        "type": "rag_query_direct_mode", "query": prompt,
-                        "vector_dbs": selected_vector_dbs,
-                        "context_length": len(prompt_context) if prompt_context else 0,
-                        "context_preview": (str(prompt_context[:200]) + "..." if prompt_context else "None")
-                    })
-                except Exception as e:
-                    st.warning(f"RAG Error (Direct Mode): {e}")
-                    debug_events_list.append({"type": "error", "source": "rag_direct_mode", "content": str(e)})
-        else:
-            prompt_context = None
+                retrieval = retrieve_context(
+                    llama_stack_api, client, prompt, vector_db_ids, settings, debug_events_list,
+                    vector_db_names=selected_vector_dbs,
+                )
+            for vector_db_id, error in retrieval.skipped.items():
+                st.caption(f"⚠️ Collection `{vector_db_id}` skipped: {error}")
+            if retrieval.error:
+                st.warning(f"RAG Error (Direct Mode): {retrieval.error}")
         
         with st.chat_message("assistant"):
-            message_placeholder = st.empty()
-            full_response = ""
-            retrieval_response = ""
-
-            # Construct the extended prompt
-            if prompt_context:
-                extended_prompt = f"Please answer the following query using the context below.\n\nCONTEXT:\n{prompt_context}\n\nQUERY:\n{prompt}"
-            else:
-                extended_prompt = f"Please answer the following query. \n\nQUERY:\n{prompt}"
-
-            # Run inference directly using the configured client (XC URL or default)
-            #st.session_state.messages.append({"role": "user", "content": extended_prompt})
-            messages_for_direct_api = (
-                [{'role': 'system', 'content': system_prompt}] +
-                [{'role': 'user', 'content': extended_prompt}]
-            )
-            response = inference_client.inference.chat_completion(
-                messages=messages_for_direct_api,
-                model_id=model,
-                sampling_params={
-                    "strategy": get_strategy(temperature, top_p),
-                    "max_tokens": max_tokens,
-                    "repetition_penalty": repetition_penalty,
-                },
-                stream=True,
-                timeout=120,
+            # Deltas are coalesced into frames instead of redrawing per token
+            renderer = StreamRenderer(st.empty())
+            generation = generate_answer(
+                llama_stack_api, inference_client, prompt, retrieval.text if retrieval else None,
+                settings, renderer, debug_events_list,
             )
 
-            # Display assistant response
-            for chunk in response:
-                if chunk.event:
-                    response_delta = chunk.event.delta
-                    if isinstance(response_delta, ToolCallDelta):
-                        retrieval_response += response_delta.tool_call.replace("====", "").strip()
-                        #retrieval_message_placeholder.info(retrieval_response)
-                    else:
-                        full_response += chunk.event.delta.text
-                        message_placeholder.markdown(full_response + "▌")
-            message_placeholder.markdown(full_response)
-
-        response_dict = {"role": "assistant", "content": full_response, "stop_reason": "end_of_message"}
+        # Per-turn latency breakdown, shown first in the turn's debug events
+        record_turn_latency(
+            turn_started, str(getattr(inference_client, "base_url", "")), settings, retrieval, generation, debug_events_list
+        )
+
+        response_dict = {"role": "assistant", "content": generation.response, "stop_reason": "end_of_message"}
         st.session_state.messages.append(response_dict)
         #st.session_state.displayed_messages.append(response_dict)
 
@@ -608,7 +683,8 @@ def tool_chat_page():
         
         # Process the prompt based on mode (Direct is hardcoded)
         if processing_mode == "Direct":
-            direct_process_prompt(prompt, current_turn_debug_events_list, client)
+            with tracing.span("chat.turn", mode=processing_mode, model=model, vector_dbs=list(selected_vector_dbs)):
+                direct_process_prompt(prompt, current_turn_debug_events_list, client)
         
     # Handle selected question from suggestions
     if st.session_state.selected_question:
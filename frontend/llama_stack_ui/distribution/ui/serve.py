@@ -0,0 +1,35 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the terms described in the LICENSE file in
+# the root directory of this source tree.
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from llama_stack_ui.distribution.ui.modules.warmup import suggestion_warmer
+
+"""
+Process entry point: starts the background services, then the Streamlit server.
+
+Streamlit only executes app.py when a browser session connects, so anything
+started from there waits for the first page load. The suggestion warmer is
+started here instead, so the caches are warm before the first user arrives.
+
+Usage:
+    python -m llama_stack_ui.distribution.ui.serve [streamlit run options]
+"""
+
+
+def main():
+    # Precompute retrieval for suggested questions in the background (no-op unless WARMUP_ENABLED)
+    suggestion_warmer.start()
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    sys.argv = ["streamlit", "run", app, *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()